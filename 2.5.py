@@ -1,22 +1,1151 @@
 import os
-import zipfile
+import errno
 import threading
-import shutil
-import tkinter as tk
-from tkinterdnd2 import DND_FILES, TkinterDnD
-from tkinter import messagebox, filedialog, ttk, Menu
-import subprocess
 import sys
 import re
-import py7zr
-import tarfile
-import pathlib
+import json
+import argparse
+import importlib
 import io
-try:
-    import rarfile
-    has_rar = True
-except ImportError:
-    has_rar = False
+import time
+import zlib
+import queue
+import struct
+import fnmatch
+import contextlib
+import gzip
+import bz2
+from collections import OrderedDict, deque
+
+class _LazyModule:
+    """首次访问属性时才导入的模块，避免启动时加载用不到的格式库"""
+    def __init__(self, name):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+# 较重的标准库模块同样首次使用时才导入，命令行和界面启动时不加载
+zipfile = _LazyModule('zipfile')
+tarfile = _LazyModule('tarfile')
+shutil = _LazyModule('shutil')
+tempfile = _LazyModule('tempfile')
+pathlib = _LazyModule('pathlib')
+subprocess = _LazyModule('subprocess')
+hashlib = _LazyModule('hashlib')
+sqlite3 = _LazyModule('sqlite3')
+lzma = _LazyModule('lzma')
+multiprocessing = _LazyModule('multiprocessing')
+concurrent_futures = _LazyModule('concurrent.futures')
+py7zr = _LazyModule('py7zr')
+rarfile = _LazyModule('rarfile')
+zstandard = _LazyModule('zstandard')
+lz4frame = _LazyModule('lz4.frame')
+_module_available = {}
+
+def _has_module(name):
+    """可选库是否可用（首次调用时才尝试导入）"""
+    if name not in _module_available:
+        try:
+            importlib.import_module(name)
+            _module_available[name] = True
+        except ImportError:
+            _module_available[name] = False
+    return _module_available[name]
+
+def _has_rar():
+    """rarfile 是否可用（首次调用时才尝试导入）"""
+    return _has_module('rarfile')
+
+def _require_module(name, fmt, package):
+    """可选库不可用时给出安装提示"""
+    if not _has_module(name):
+        raise Exception(f"不支持{fmt}格式，请安装{package}库")
+
+# 压缩格式的文件头特征：(偏移, 特征字节, 格式)
+ARCHIVE_SIGNATURES = [
+    (0, b'PK\x03\x04', 'zip'),
+    (0, b'PK\x05\x06', 'zip'),  # 空ZIP
+    (0, b'Rar!\x1a\x07', 'rar'),
+    (0, b"7z\xbc\xaf'\x1c", '7z'),
+    (257, b'ustar', 'tar'),
+]
+# 扩展名与格式的对应关系，识别不了文件头时使用
+ARCHIVE_EXTENSIONS = {
+    '.zip': 'zip', '.rar': 'rar', '.7z': '7z',
+    '.tar': 'tar', '.tar.gz': 'tar', '.tgz': 'tar', '.tar.bz2': 'tar', '.tbz2': 'tar',
+    '.tar.zst': 'tar', '.tzst': 'tar', '.tar.lz4': 'tar',
+}
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'  # zstd 帧头
+LZ4_MAGIC = b'\x04\x22\x4d\x18'   # lz4 frame 帧头
+# 基于ZIP的文档/安装包格式，默认不当作压缩包展开
+ZIP_CONTAINER_EXTENSIONS = (
+    '.docx', '.docm', '.dotx', '.xlsx', '.xlsm', '.xltx', '.pptx', '.pptm', '.ppsx',
+    '.odt', '.ods', '.odp', '.odg', '.epub', '.xps', '.oxps', '.3mf', '.kmz',
+    '.jar', '.war', '.ear', '.aar', '.apk', '.aab', '.ipa', '.xpi', '.vsix',
+    '.nupkg', '.whl', '.egg', '.appx', '.msix',
+)
+HEADER_PEEK_SIZE = 4096  # 识别格式时读取的文件头长度
+
+
+def _is_zip_container(path):
+    """按内容判断ZIP是否为文档/安装包容器：OOXML/XPS/NuGet 的 [Content_Types].xml、
+    ODF/EPUB 的首个成员 mimetype、JAR/WAR/APK 等的 META-INF/MANIFEST.MF"""
+    try:
+        with zipfile.ZipFile(path, 'r') as zf:
+            names = zf.namelist()
+    except (zipfile.BadZipFile, OSError, ValueError):
+        return False
+    return bool(names) and (names[0] == 'mimetype' or '[Content_Types].xml' in names
+                            or 'META-INF/MANIFEST.MF' in names)
+
+
+class FormatHandler:
+    """一种压缩格式的能力和解压后端：
+    streamable - 能从不可回退的成员流顺序解压；random_access - 需要可随机访问的文件对象；
+    listable - 不解压内容就能读取目录；extract - 纯Python后端的方法名；backends - 后端按默认优先顺序排列"""
+    def __init__(self, name, streamable, random_access, listable, extract, backends):
+        self.name = name
+        self.streamable = streamable
+        self.random_access = random_access
+        self.listable = listable
+        self.extract = extract
+        self.backends = backends
+
+# 格式注册表：'python' 为本程序内置的库实现，其余为系统中的外部程序
+FORMAT_HANDLERS = {
+    'zip': FormatHandler('zip', False, True, True, '_extract_zip_file', ('python', '7z', 'bsdtar')),
+    '7z': FormatHandler('7z', False, True, True, '_extract_7z_file', ('python', '7z', 'bsdtar')),
+    'rar': FormatHandler('rar', False, False, True, '_extract_rar_file', ('python', 'unrar', '7z', 'bsdtar')),
+    'tar': FormatHandler('tar', True, False, False, '_extract_tar_stream', ('python', 'bsdtar')),
+}
+# 外部解压程序：后端名 -> (候选可执行文件名, 生成命令行的函数(程序, 压缩包, 目标目录))
+EXTERNAL_BACKENDS = {
+    '7z': (('7zz', '7z', '7za'),
+           lambda exe, archive, target: [exe, 'x', '-y', '-bd', '-o' + target, '--', archive]),
+    'bsdtar': (('bsdtar',),
+               lambda exe, archive, target: [exe, '-x', '-f', archive, '-C', target]),
+    'unrar': (('unrar',),
+              lambda exe, archive, target: [exe, 'x', '-y', '-o+', '-p-', '--', archive, target + os.sep]),
+}
+# 压缩格式 -> 写入方法名
+COMPRESS_WRITERS = {
+    'zip': '_write_zip', '7z': '_write_7z', 'tar': '_write_tar_gz',
+    'tar.zst': '_write_tar_zst', 'tar.lz4': '_write_tar_lz4', 'rar': '_write_rar',
+}
+
+
+def _unrar_batch_line(line):
+    """unrar 输出 'Extracting  名称  OK'，返回成员名"""
+    line = line.strip()
+    if not line.startswith('Extracting') or line.startswith('Extracting from') or not line.endswith('OK'):
+        return None
+    return line[len('Extracting'):-2].strip()
+
+# 批量解压RAR的外部程序：后端名 -> (生成命令行的函数(程序, 压缩包, 目标目录, 列表文件或None), 从输出行取出成员名的函数)
+RAR_BATCH_TOOLS = {
+    'unrar': (lambda exe, archive, target, listfile:
+              [exe, 'x', '-y', '-o+', '-p-', '-idc', '-idp', '-scfl', archive]
+              + (['@' + listfile] if listfile else []) + [target + os.sep],
+              _unrar_batch_line),
+    '7z': (lambda exe, archive, target, listfile:
+           [exe, 'x', '-y', '-bd', '-bb1', '-scsUTF-8', '-o' + target, archive]
+           + (['@' + listfile] if listfile else []),
+           lambda line: line[2:].strip() if line.startswith('- ') else None),
+    'bsdtar': (lambda exe, archive, target, listfile:
+               [exe, '-x', '-v', '-f', archive, '-C', target] + (['-T', listfile] if listfile else []),
+               lambda line: line[2:].strip() if line.startswith('x ') else None),
+}
+_tool_paths = {}
+
+def _tool_env():
+    """外部程序的环境变量：Linux 下使用 UTF-8 区域设置，否则非ASCII文件名可能无法转换"""
+    env = dict(os.environ)
+    if sys.platform.startswith('linux'):
+        env['LC_ALL'] = 'C.UTF-8'
+    return env
+
+def _find_tool(backend):
+    """查找外部后端的可执行文件（结果缓存），找不到返回None"""
+    if backend not in _tool_paths:
+        names = EXTERNAL_BACKENDS[backend][0]
+        _tool_paths[backend] = next((path for path in map(shutil.which, names) if path), None)
+    return _tool_paths[backend]
+
+
+def _reflink(src, dst):
+    """在支持的文件系统（btrfs/xfs等）上用 FICLONE 创建写时复制副本，不支持时返回False"""
+    if not sys.platform.startswith('linux'):
+        return False
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    FICLONE = 0x40049409
+    try:
+        with open(src, 'rb') as fsrc, open(dst, 'wb') as fdst:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        shutil.copystat(src, dst)
+        return True
+    except OSError:
+        try:
+            os.remove(dst)
+        except OSError:
+            pass
+        return False
+
+
+class _InterruptibleReader(io.BufferedIOBase):
+    """包装源文件供 tarfile.addfile、py7zr.writef 等按块读取的接口使用：
+    每次读取前检查暂停/终止，读满一块报告一次字节数"""
+    def __init__(self, raw, check, report=None, report_every=1024 * 1024):
+        self._raw = raw
+        self._check = check
+        self._report = report
+        self._report_every = report_every
+        self._pending = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return self._raw.seekable()
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self._raw.seek(offset, whence)
+
+    def tell(self):
+        return self._raw.tell()
+
+    def read(self, size=-1):
+        self._check()
+        data = self._raw.read(size)
+        self._pending += len(data)
+        if self._pending and (not data or self._pending >= self._report_every):
+            self.report()
+        return data
+
+    read1 = read
+
+    def report(self):
+        """报告尚未报告的字节数"""
+        if self._report is not None and self._pending:
+            self._report(self._pending)
+        self._pending = 0
+
+
+class _FileWindow(io.RawIOBase):
+    """只读窗口：把外层文件中 [offset, offset+size) 这一段当作独立的文件，
+    存储方式（不压缩）保存的内层压缩包可直接打开，无需复制"""
+    def __init__(self, path, offset, size):
+        self._file = open(path, 'rb')
+        self.path = path
+        self.offset = offset  # 窗口在外层文件中的起始偏移
+        self._size = size
+        self._pos = 0
+
+    @property
+    def fd(self):
+        """外层文件的描述符（注意偏移要加上 offset）"""
+        return self._file.fileno()
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, pos, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            pos += self._pos
+        elif whence == os.SEEK_END:
+            pos += self._size
+        self._pos = max(0, pos)
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def readinto(self, b):
+        n = min(len(b), self._size - self._pos)
+        if n <= 0:
+            return 0
+        self._file.seek(self.offset + self._pos)
+        data = self._file.read(n)
+        b[:len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+_ZIP_LOCAL_HEADER = struct.Struct('<4sHHHHHIIIHH')  # ZIP本地文件头（固定部分30字节）
+_kernel_copy_state = {'copy_file_range': hasattr(os, 'copy_file_range'), 'sendfile': hasattr(os, 'sendfile')}
+# 表示内核或文件系统不支持该复制方式的错误码，只有这些才改用下一种方式；磁盘满、I/O错误等照常抛出
+_KERNEL_COPY_UNSUPPORTED = frozenset(
+    getattr(errno, name) for name in ('ENOSYS', 'EXDEV', 'EINVAL', 'EOPNOTSUPP', 'ENOTSUP') if hasattr(errno, name))
+
+
+def _kernel_copy(src_fd, dst_fd, offset, count):
+    """把 src_fd 中 offset 开始的最多 count 字节追加写到 dst_fd 的当前位置：优先 copy_file_range，
+    其次 sendfile，数据不经过Python缓冲区；都不可用时退回 pread/write。返回复制的字节数"""
+    if _kernel_copy_state['copy_file_range']:
+        try:
+            return os.copy_file_range(src_fd, dst_fd, count, offset)
+        except OSError as e:
+            if e.errno not in _KERNEL_COPY_UNSUPPORTED:
+                raise
+            # 旧内核或跨文件系统不支持，之后改用 sendfile
+            _kernel_copy_state['copy_file_range'] = False
+    if _kernel_copy_state['sendfile']:
+        try:
+            return os.sendfile(dst_fd, src_fd, offset, count)
+        except OSError as e:
+            if e.errno not in _KERNEL_COPY_UNSUPPORTED:
+                raise
+            _kernel_copy_state['sendfile'] = False
+    data = os.pread(src_fd, count, offset)
+    return os.write(dst_fd, data)
+
+
+_SCAN_CHUNK = 16 * 1024 * 1024       # 扫描分割点时每次读取的字节数
+_MAX_GZIP_SEGMENT = 64 * 1024 * 1024  # gzip 单个成员超过该大小时不并行（压缩数据要整体读入内存）
+_MAX_SEGMENT_OUTPUT = 64 * 1024 * 1024  # 单个分段解压结果的上限（整体放在内存里），超过时回退串行
+_BZ2_BLOCK_MAGIC = 0x314159265359     # bzip2 数据块起始标志（48位，按位对齐）
+_BZ2_EOS_MAGIC = 0x177245385090       # bzip2 数据流结束标志（48位，按位对齐）
+
+
+def _scan_file(path, find, overlap, bits=False):
+    """分块扫描文件，find(data) 返回块内命中的字节偏移（bits=True 时为位偏移），返回整个文件内的命中位置"""
+    hits = set()
+    scale = 8 if bits else 1
+    with open(path, 'rb') as f:
+        base = 0
+        tail = b''
+        while True:
+            chunk = f.read(_SCAN_CHUNK)
+            if not chunk:
+                break
+            data = tail + chunk
+            start = (base - len(tail)) * scale
+            hits.update(start + pos for pos in find(data))
+            tail = data[-overlap:]
+            base += len(chunk)
+    return sorted(hits)
+
+
+def _find_gzip_headers(data):
+    """gzip 成员头：1f 8b 08，标志字节保留位为0"""
+    pos = data.find(b'\x1f\x8b\x08')
+    while pos != -1:
+        if pos + 3 < len(data) and not data[pos + 3] & 0xE0:
+            yield pos
+        pos = data.find(b'\x1f\x8b\x08', pos + 1)
+
+
+def _find_bzip2_streams(data):
+    """bzip2 数据流头：'BZh' + 级别1-9 + 数据块标志（按字节对齐）"""
+    magic = _BZ2_BLOCK_MAGIC.to_bytes(6, 'big')
+    pos = data.find(b'BZh')
+    while pos != -1:
+        if data[pos + 3:pos + 4] in (b'1', b'2', b'3', b'4', b'5', b'6', b'7', b'8', b'9') \
+                and data[pos + 4:pos + 10] == magic:
+            yield pos
+        pos = data.find(b'BZh', pos + 1)
+
+
+def _find_bit_pattern(pattern):
+    """返回在数据中查找任意位偏移处48位标志的函数，命中结果为位偏移"""
+    def find(data):
+        for shift in range(8):
+            field = (pattern << (8 - shift)).to_bytes(7, 'big')
+            middle = field[1:6] if shift else field[0:6]
+            first_mask = 0xFF >> shift
+            last_mask = (0xFF << (8 - shift)) & 0xFF
+            pos = data.find(middle)
+            while pos != -1:
+                if not shift:
+                    yield pos * 8
+                elif pos >= 1 and pos + 5 < len(data) \
+                        and data[pos - 1] & first_mask == field[0] \
+                        and data[pos + 5] & last_mask == field[6]:
+                    yield (pos - 1) * 8 + shift
+                pos = data.find(middle, pos + 1)
+    return find
+
+
+def _gzip_segments(path):
+    """多成员gzip按成员分段；单成员或成员过大时返回None（只能串行解压）"""
+    starts = _scan_file(path, _find_gzip_headers, 3)
+    if len(starts) < 2 or starts[0] != 0:
+        return None
+    ends = starts[1:] + [os.path.getsize(path)]
+    if max(end - start for start, end in zip(starts, ends)) > _MAX_GZIP_SEGMENT:
+        return None
+    return [('gzip', start, end) for start, end in zip(starts, ends)]
+
+
+def _bzip2_segments(path):
+    """多数据流bzip2（如pbzip2的输出）按数据流分段；单数据流则按位查找数据块，每块单独成段"""
+    streams = _scan_file(path, _find_bzip2_streams, 9)
+    if not streams or streams[0] != 0:
+        return None
+    if len(streams) > 1:
+        ends = streams[1:] + [os.path.getsize(path)]
+        return [('bz2', start, end) for start, end in zip(streams, ends)]
+    with open(path, 'rb') as f:
+        level = f.read(4)[3:4]
+    blocks = _scan_file(path, _find_bit_pattern(_BZ2_BLOCK_MAGIC), 7, bits=True)
+    ends = [pos for pos in _scan_file(path, _find_bit_pattern(_BZ2_EOS_MAGIC), 7, bits=True)
+            if blocks and pos > blocks[-1]]
+    if len(blocks) < 2 or blocks[0] != 32 or not ends:
+        return None
+    return [('bz2block', start, end, level) for start, end in zip(blocks, blocks[1:] + ends[:1])]
+
+
+def _decode_segment(path, segment):
+    """解压一个分段；分割点不是真实边界时抛出异常，由调用方回退串行"""
+    kind, start, end = segment[:3]
+    with open(path, 'rb') as f:
+        if kind == 'bz2block':
+            f.seek(start // 8)
+            data = f.read((end + 7) // 8 - start // 8)
+        else:
+            f.seek(start)
+            data = f.read(end - start)
+    if kind == 'gzip':
+        decompressor = zlib.decompressobj(wbits=31)
+        output = _decompress_bounded(decompressor, data, f"gzip 分段 {start}-{end}")
+        if not decompressor.eof or decompressor.unused_data.strip(b'\0'):
+            raise ValueError(f"gzip 分段 {start}-{end} 不是完整成员")
+        return output
+    if kind == 'bz2':
+        decompressor = bz2.BZ2Decompressor()
+        output = _decompress_bounded(decompressor, data, f"bzip2 分段 {start}-{end}")
+        if not decompressor.eof or decompressor.unused_data:
+            raise ValueError(f"bzip2 分段 {start}-{end} 不是完整数据流")
+        return output
+    # 把按位对齐的单个数据块重新包装成只含一块的数据流：数据流CRC等于该块的CRC
+    nbits = end - start
+    value = int.from_bytes(data, 'big') >> (len(data) * 8 - (end - start // 8 * 8))
+    value &= (1 << nbits) - 1
+    block_crc = (value >> (nbits - 80)) & 0xFFFFFFFF
+    value = (((value << 48) | _BZ2_EOS_MAGIC) << 32) | block_crc
+    nbits += 80
+    pad = -nbits % 8
+    stream = b'BZh' + segment[3] + (value << pad).to_bytes((nbits + pad) // 8, 'big')
+    decompressor = bz2.BZ2Decompressor()
+    output = _decompress_bounded(decompressor, stream, f"bzip2 数据块 {start}-{end}")
+    if not decompressor.eof:
+        raise ValueError(f"bzip2 数据块 {start}-{end} 不完整")
+    return output
+
+
+def _decompress_bounded(decompressor, data, label):
+    """解压一个分段，解压结果超过 _MAX_SEGMENT_OUTPUT 时抛出异常（由调用方回退串行），
+    并行窗口内同时驻留的解压结果因此有上限"""
+    output = decompressor.decompress(data, _MAX_SEGMENT_OUTPUT)
+    if not decompressor.eof and len(output) >= _MAX_SEGMENT_OUTPUT:
+        raise ValueError(f"{label} 解压后超过 {_MAX_SEGMENT_OUTPUT} 字节")
+    return output
+
+
+class _ParallelDecompressReader(io.RawIOBase):
+    """按分段并行解压、按顺序输出的只读流，供 tarfile 以 'r|' 模式读取；
+    某个分段校验失败时从头串行解压并跳过已经输出的字节"""
+
+    def __init__(self, path, segments, serial_open, workers):
+        super().__init__()
+        self._path = path
+        self._segments = segments
+        self._serial_open = serial_open
+        self._pool = concurrent_futures.ThreadPoolExecutor(max_workers=workers)
+        self._window = workers * 2
+        self._pending = deque()
+        self._next = 0
+        self._buffer = memoryview(b'')
+        self._delivered = 0
+        self._serial = None
+        self._fill()
+
+    def _fill(self):
+        while len(self._pending) < self._window and self._next < len(self._segments):
+            self._pending.append(self._pool.submit(_decode_segment, self._path, self._segments[self._next]))
+            self._next += 1
+
+    def _fall_back(self):
+        for future in self._pending:
+            future.cancel()
+        self._pending.clear()
+        self._serial = self._serial_open(self._path)
+        remaining = self._delivered
+        while remaining:
+            skipped = len(self._serial.read(min(remaining, 1024 * 1024)))
+            if not skipped:
+                break
+            remaining -= skipped
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while True:
+            if self._serial is not None:
+                n = self._serial.readinto(b)
+                self._delivered += n
+                return n
+            if self._buffer:
+                n = min(len(b), len(self._buffer))
+                b[:n] = self._buffer[:n]
+                self._buffer = self._buffer[n:]
+                self._delivered += n
+                return n
+            if not self._pending:
+                return 0
+            future = self._pending.popleft()
+            try:
+                self._buffer = memoryview(future.result())
+            except Exception:
+                self._fall_back()
+                continue
+            self._fill()
+
+    def close(self):
+        if not self.closed:
+            for future in self._pending:
+                future.cancel()
+            self._pool.shutdown(wait=False)
+            if self._serial is not None:
+                self._serial.close()
+        super().close()
+
+
+def _tar_decompressor(source):
+    """tarfile 的 'r|*' 只解压第一个gzip成员/bzip2数据流，也不支持 zstd/lz4：
+    .tar.gz/.tar.bz2/.tar.zst/.tar.lz4 返回由对应模块解压的流（支持多成员/多帧），交给 tarfile 以 'r|' 读取。
+    其他格式或无法预读文件头时返回None，仍用 'r|*'"""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            magic = f.read(4)
+        if magic[:2] == b'\x1f\x8b':
+            return gzip.open(source, 'rb')
+        if magic[:3] == b'BZh':
+            return bz2.open(source, 'rb')
+        if magic == ZSTD_MAGIC:
+            _require_module('zstandard', 'tar.zst', 'zstandard')
+            return zstandard.ZstdDecompressor().stream_reader(open(source, 'rb'), read_across_frames=True)
+        if magic == LZ4_MAGIC:
+            _require_module('lz4.frame', 'tar.lz4', 'lz4')
+            return lz4frame.open(source, 'rb')
+        return None
+    # 优先 peek：对解压流 seek 回退可能要从头重新解压
+    if hasattr(source, 'peek'):
+        magic = source.peek(4)[:4]
+    elif isinstance(source, _FileWindow):
+        position = source.tell()
+        magic = source.read(4)
+        source.seek(position)
+    else:
+        return None
+    if magic[:2] == b'\x1f\x8b':
+        return gzip.GzipFile(fileobj=source, mode='rb')
+    if magic[:3] == b'BZh':
+        return bz2.BZ2File(source, 'rb')
+    if magic == ZSTD_MAGIC:
+        _require_module('zstandard', 'tar.zst', 'zstandard')
+        return zstandard.ZstdDecompressor().stream_reader(source, read_across_frames=True, closefd=False)
+    if magic == LZ4_MAGIC:
+        _require_module('lz4.frame', 'tar.lz4', 'lz4')
+        return lz4frame.LZ4FrameFile(source, 'rb')
+    return None
+
+
+def _open_parallel_decompress(path, workers):
+    """gzip/bzip2 能分段时返回并行解压流，否则返回None"""
+    with open(path, 'rb') as f:
+        magic = f.read(3)
+    if magic[:2] == b'\x1f\x8b':
+        segments, serial_open = _gzip_segments(path), gzip.open
+    elif magic == b'BZh':
+        segments, serial_open = _bzip2_segments(path), bz2.open
+    else:
+        return None
+    if not segments:
+        return None
+    return _ParallelDecompressReader(path, segments, serial_open, workers)
+
+
+# 本身已压缩的格式：再压缩几乎没有收益，直接存储
+_STORED_EXTENSIONS = frozenset((
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.heic', '.avif',
+    '.mp3', '.aac', '.m4a', '.ogg', '.opus', '.flac',
+    '.mp4', '.m4v', '.mkv', '.avi', '.mov', '.webm', '.wmv', '.flv',
+    '.zip', '.7z', '.rar', '.gz', '.tgz', '.bz2', '.tbz2', '.xz', '.txz', '.zst', '.lz4', '.cab',
+    '.jar', '.apk', '.docx', '.xlsx', '.pptx', '.odt', '.epub', '.woff', '.woff2', '.pdf',
+))
+_STORE_SAMPLE = 64 * 1024       # 采样块大小；更小的文件不采样，直接压缩
+_STORE_RATIO = 0.95            # 采样块用 zlib 级别1 快速压缩后仍不小于该比例才视为不可压缩
+_STORE_ARCHIVE_RATIO = 0.9      # 7z/tar.gz 整包只有一个压缩流：不可压缩数据占比达到该值时整包不压缩
+
+
+def _read_sample(path, size):
+    """从文件中部读取采样块（文件头部常是容易压缩的格式头）"""
+    with open(path, 'rb') as f:
+        f.seek(max(0, size // 2 - _STORE_SAMPLE // 2))
+        return f.read(_STORE_SAMPLE)
+
+
+def _compress_cost(fmt):
+    """用该格式实际使用的压缩算法压缩一个固定的高熵样本，返回每字节消耗的CPU秒数，用于估计节省的CPU时间"""
+    import random
+    sample = random.Random(0).randbytes(_STORE_SAMPLE)
+    start = time.thread_time()
+    if fmt == '7z':
+        lzma.compress(sample, format=lzma.FORMAT_RAW, filters=[{'id': lzma.FILTER_LZMA2, 'preset': 7}])
+    else:
+        # zipfile 默认级别；tarfile 的 w:gz 为级别9
+        zlib.compress(sample, 9 if fmt == 'tar' else zlib.Z_DEFAULT_COMPRESSION)
+    return (time.thread_time() - start) / len(sample)
+
+
+class _SevenZipFileWriter:
+    """py7zr extractall(factory=...) 的输出对象：直接写入磁盘文件，每次写入前检查暂停/终止并报告字节数"""
+    def __init__(self, path, check, report=None):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._file = open(path, 'wb')
+        self._check = check
+        self._report = report
+
+    def write(self, data):
+        self._check()
+        written = self._file.write(data)
+        if self._report is not None:
+            self._report(len(data))
+        return written
+
+    def read(self, size=None):
+        return b''
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self._file.seek(offset, whence)
+
+    def seekable(self):
+        return False  # 避免 py7zr 在关闭前回到开头
+
+    def flush(self):
+        self._file.flush()
+
+    def size(self):
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+
+class _SevenZipWriterFactory:
+    """为 py7zr 的每个成员创建 _SevenZipFileWriter，并记录写出的文件"""
+    def __init__(self, check, report=None):
+        self._check = check
+        self._report = report
+        self.paths = []
+
+    def create(self, filename):
+        path = os.path.normpath(filename)
+        self.paths.append(path)
+        return _SevenZipFileWriter(path, self._check, self._report)
+
+
+class _SevenZipMemberFactory:
+    """py7zr 只解压一个成员时，把它写到指定的文件"""
+    def __init__(self, path, check):
+        self._path = path
+        self._check = check
+
+    def create(self, filename):
+        return _SevenZipFileWriter(self._path, self._check)
+
+
+class _MemberStream(io.RawIOBase):
+    """按嵌套路径打开的成员流：关闭时依次关闭各层打开的压缩包，并删除成员的临时文件"""
+    def __init__(self, stream, resources=(), size=None, window=None, temp=None):
+        self._stream = stream
+        self._resources = list(resources)  # 关闭时按相反顺序调用
+        self.size = size      # 成员解压后的大小
+        self.window = window  # 存储方式的ZIP成员在磁盘文件中的位置 (路径, 偏移, 大小)，否则为None
+        self.temp = temp      # 成员已完整解压到的临时文件（7z），否则为None
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+    def keep_temp(self):
+        """接管临时文件：关闭时不再删除，返回其路径"""
+        temp, self.temp = self.temp, None
+        return temp
+
+    def close(self):
+        if not self.closed:
+            try:
+                self._stream.close()
+                if self.temp is not None:
+                    with contextlib.suppress(OSError):
+                        os.remove(self.temp)
+            finally:
+                for release in reversed(self._resources):
+                    release()
+        super().close()
+
+
+def _sevenzip_outputs(zf, target):
+    """按 py7zr extractall 的规则计算每个成员的输出路径（同名成员依次加 _0、_1 后缀），
+    返回 [(ArchiveFile, pathlib.Path)]"""
+    seen = {}
+    outputs = []
+    for f in zf.files:
+        if f.filename not in seen:
+            outname = f.filename
+            seen[f.filename] = 0
+        else:
+            outname = f"{f.filename}_{seen[f.filename]}"
+            seen[f.filename] += 1
+        outputs.append((f, py7zr.helpers.get_sanitized_output_path(outname, pathlib.Path(target))))
+    return outputs
+
+
+class _QueueByteReporter:
+    """子进程中累计写出的字节数，每满 1MB 通过进程间队列报告一次，避免每个数据块都跨进程通信；
+    py7zr 会用多个线程同时解压多个文件夹，因此加锁"""
+    def __init__(self, bytes_queue, batch=1 << 20):
+        self._queue = bytes_queue
+        self._batch = batch
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, nbytes):
+        with self._lock:
+            self._pending += nbytes
+            if self._pending < self._batch:
+                return
+            nbytes, self._pending = self._pending, 0
+        self._queue.put(nbytes)
+
+    def flush(self):
+        with self._lock:
+            nbytes, self._pending = self._pending, 0
+        if nbytes:
+            self._queue.put(nbytes)
+
+
+class ProgressEvent:
+    """结构化进度事件：阶段、压缩包、成员、字节/文件进度和嵌套深度（顶层压缩包为0）"""
+    __slots__ = ('phase', 'archive', 'member', 'bytes_done', 'bytes_total',
+                 'files_done', 'files_total', 'depth', 'elapsed', 'message')
+
+    def __init__(self, phase, archive=None, member=None, bytes_done=0, bytes_total=None,
+                 files_done=0, files_total=None, depth=0, elapsed=0.0, message=None):
+        self.phase = phase              # 'extract' / 'nested' / 'compress' / 'message'
+        self.archive = archive
+        self.member = member
+        self.bytes_done = bytes_done
+        self.bytes_total = bytes_total  # 来自中央目录/文件头的解压后大小，未知时为None
+        self.files_done = files_done
+        self.files_total = files_total
+        self.depth = depth
+        self.elapsed = elapsed          # 从该压缩包开始处理到现在的秒数
+        self.message = message          # 文本消息，仅 'message' 阶段使用
+
+    @property
+    def percent(self):
+        """完成百分比，优先按字节计算，未知时返回None"""
+        if self.bytes_total:
+            return min(100.0, self.bytes_done * 100.0 / self.bytes_total)
+        if self.files_total:
+            return min(100.0, self.files_done * 100.0 / self.files_total)
+        return None
+
+    @property
+    def speed(self):
+        """吞吐量（字节/秒）"""
+        return self.bytes_done / self.elapsed if self.elapsed > 0 else None
+
+    @property
+    def eta(self):
+        """预计剩余秒数，未知时返回None"""
+        speed = self.speed
+        if not speed or self.bytes_total is None:
+            return None
+        return max(0.0, (self.bytes_total - self.bytes_done) / speed)
+
+    def to_dict(self):
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data.update(percent=self.percent, speed=self.speed, eta=self.eta)
+        return data
+
+
+class ProgressTracker:
+    """统计单个压缩包的解压/压缩进度并发出进度事件，可被多个线程同时更新"""
+    def __init__(self, emit, phase, archive, bytes_total=None, files_total=None, depth=0):
+        self._emit = emit
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self.phase = phase
+        self.archive = archive
+        self.bytes_total = bytes_total
+        self.files_total = files_total
+        self.depth = depth
+        self.bytes_done = 0
+        self.files_done = 0
+
+    def advance(self, member=None, nbytes=0, files=1):
+        """记录一个成员（或一批字节）完成"""
+        with self._lock:
+            self.bytes_done += nbytes
+            self.files_done += files
+            event = ProgressEvent(self.phase, self.archive, member, self.bytes_done, self.bytes_total,
+                                  self.files_done, self.files_total, self.depth,
+                                  time.monotonic() - self._start)
+        self._emit(event)
+
+
+class ProgressChannel:
+    """工作线程到界面的进度通道：工作线程只覆盖"最新状态"并累加计数，不直接操作界面；
+    界面按固定帧率调用 poll 取最新状态，大量小文件时也不会堆积界面事件"""
+    def __init__(self, formatter):
+        self._formatter = formatter  # ProgressEvent -> 文字
+        self._lock = threading.Lock()
+        self._latest = None          # 最新的进度事件（单槽，新事件直接覆盖旧事件）
+        self._dirty = False
+        self._last = {}              # 压缩包 -> (已完成文件数, 已完成字节数)，用于计算增量
+        self.files_done = 0          # 本次任务累计完成的文件数
+        self.bytes_done = 0          # 本次任务累计完成的字节数
+
+    def reset(self):
+        """开始新任务时清空累计计数"""
+        with self._lock:
+            self._latest = None
+            self._dirty = False
+            self._last.clear()
+            self.files_done = 0
+            self.bytes_done = 0
+
+    def push(self, event):
+        """工作线程调用：记录最新事件并累加计数"""
+        with self._lock:
+            if event.phase != 'message':
+                last_files, last_bytes = self._last.get(event.archive, (0, 0))
+                self.files_done += max(0, event.files_done - last_files)
+                self.bytes_done += max(0, event.bytes_done - last_bytes)
+                self._last[event.archive] = (event.files_done, event.bytes_done)
+            self._latest = event
+            self._dirty = True
+
+    def poll(self):
+        """界面线程调用：有新状态时返回要显示的文字，否则返回None"""
+        with self._lock:
+            if not self._dirty:
+                return None
+            self._dirty = False
+            event = self._latest
+            files_done = self.files_done
+            bytes_done = self.bytes_done
+        text = self._formatter(event) or ""
+        if text and files_done:
+            text += f"\n累计已处理 {files_done} 个文件，{bytes_done / 1024 / 1024:.1f} MB"
+        return text
+
+
+class ArchiveListing:
+    """压缩包目录信息，只包含元数据，不包含文件内容"""
+    def __init__(self, entries, infos=None, crcs=None):
+        self.entries = entries  # [(成员名, 是否目录, 解压后大小)]
+        self.infos = infos      # zip/tar 的原始 ZipInfo/TarInfo 列表，解压时可直接复用
+        self.crcs = crcs        # 与 entries 一一对应的成员CRC（zip/7z/rar 的目录中有），未知时为None
+
+
+def _glob_match(segments, parts, prefix=False):
+    """按路径段匹配 glob（** 匹配任意层）；prefix 为True时判断 parts 之下更深的路径能否匹配"""
+    if not parts:
+        return bool(segments) if prefix else all(s == '**' for s in segments)
+    if not segments:
+        return False
+    if segments[0] == '**':
+        return _glob_match(segments[1:], parts, prefix) or _glob_match(segments, parts[1:], prefix)
+    return fnmatch.fnmatchcase(parts[0], segments[0]) and _glob_match(segments[1:], parts[1:], prefix)
+
+
+class PathFilter:
+    """按逻辑嵌套路径（如 outer.zip/lib/inner.7z/config/app.yml）筛选要解压的成员。
+    模式默认为 glob：* 和 ? 不跨越 /，** 匹配任意层目录；以 / 开头的模式从最外层压缩包名开始匹配，
+    否则可从任意一层开始（*.log 匹配任意位置的 .log 文件）；re: 开头的模式为正则表达式，在整个路径中搜索。
+    没有包含模式时保留全部，排除模式优先"""
+    def __init__(self, include=(), exclude=()):
+        self.include = [self._compile(p) for p in include]
+        self.exclude = [self._compile(p) for p in exclude]
+
+    @staticmethod
+    def _compile(pattern):
+        if pattern.startswith('re:'):
+            return re.compile(pattern[3:])
+        segments = [] if pattern.startswith('/') else ['**']
+        for part in pattern.split('/'):
+            if part and not (part == '**' and segments and segments[-1] == '**'):
+                segments.append(part)
+        return tuple(segments)
+
+    @staticmethod
+    def _match(pattern, path, prefix=False):
+        if isinstance(pattern, tuple):
+            return _glob_match(pattern, path.split('/'), prefix)
+        # 正则无法判断更深的路径能否匹配，按可能匹配处理
+        return prefix or pattern.search(path) is not None
+
+    def includes(self, path):
+        return not self.include or any(self._match(p, path) for p in self.include)
+
+    def excludes(self, path):
+        return any(self._match(p, path) for p in self.exclude)
+
+    def may_contain(self, path):
+        """path（内层压缩包或目录）之下是否可能有要保留的文件"""
+        parts = path.split('/')
+        for pattern in self.exclude:
+            # 形如 a/** 的排除模式匹配 path 或其上层时，其下的所有内容都被排除
+            if isinstance(pattern, tuple) and pattern[-1] == '**' and \
+                    any(_glob_match(pattern[:-1], parts[:k]) for k in range(1, len(parts) + 1)):
+                return False
+        return not self.include or any(self._match(p, path, prefix=True) for p in self.include)
+
+
+class ExtractionCatalog:
+    """解压内容目录（SQLite）：每个解压出的文件一行，记录嵌套链、大小、CRC、来源压缩包和时间，
+    可跨多次运行查询"某文件来自哪个压缩包""文件X在哪里"；写入先缓存，按批提交事务"""
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY,      -- 解压后的绝对路径
+            name TEXT NOT NULL,         -- 文件名
+            chain TEXT NOT NULL,        -- 嵌套链，如 /data/outer.zip!/lib/inner.7z!/etc/x.conf
+            depth INTEGER NOT NULL,     -- 所在压缩包的嵌套深度，最外层为0
+            size INTEGER,
+            crc INTEGER,                -- 压缩包中记录的CRC32，格式不提供时为空
+            source_archive TEXT,        -- 直接包含该文件的压缩包
+            root_archive TEXT,          -- 最外层压缩包
+            mtime REAL,
+            extracted_at REAL
+        );
+        CREATE INDEX IF NOT EXISTS files_name ON files(name);
+        CREATE INDEX IF NOT EXISTS files_root ON files(root_archive);
+    """
+
+    def __init__(self, path, batch_size=1000):
+        self.path = path
+        self.batch_size = batch_size  # 每个事务提交的行数
+        self._lock = threading.Lock()
+        self._pending = []
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(self.SCHEMA)
+
+    def add(self, rows):
+        """加入若干行 (path, name, chain, depth, size, crc, source_archive, root_archive, mtime, extracted_at)，
+        累计满一批时提交"""
+        with self._lock:
+            self._pending.extend(rows)
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self):
+        """提交缓存中的所有行"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if not self._pending:
+            return
+        with self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                   self._pending)
+        self._pending = []
+
+    def crcs(self, paths):
+        """查询已记录文件的CRC，返回 {路径: CRC}"""
+        self.flush()
+        result = {}
+        with self._lock:
+            for path in paths:
+                row = self._conn.execute("SELECT crc FROM files WHERE path = ?", (path,)).fetchone()
+                if row is not None:
+                    result[path] = row[0]
+        return result
+
+    def find(self, pattern):
+        """按文件名或嵌套链匹配（支持 * ? 通配符）查找文件，返回字典列表"""
+        self.flush()
+        columns = ('path', 'name', 'chain', 'depth', 'size', 'crc', 'source_archive', 'root_archive',
+                   'mtime', 'extracted_at')
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM files WHERE name GLOB ?1 OR chain GLOB ?1 OR path GLOB ?1 ORDER BY chain",
+                (pattern,)).fetchall()
+        return [dict(zip(columns, row)) for row in rows]
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+
+class ExtractionJournal:
+    """预写日志（只追加的JSON行）：记录最外层压缩包的目标目录与阶段、嵌套压缩包分配的子文件夹与完成情况、
+    已完整写出的成员。进程中断后以 resume=True 打开，可跳过已完成的部分继续解压。
+    每次落盘用一次 os.write 追加写入，子进程可以同时写同一个日志文件"""
+    MEMBER_FLUSH_EVERY = 256  # 成员记录攒够这么多条才落盘；丢失的记录只会导致该成员重新解压
+
+    def __init__(self, path, resume=False):
+        self.path = os.path.abspath(path)
+        self.targets = {}     # 最外层压缩包 -> 解压目录
+        self.extracted = {}   # 最外层压缩包 -> 成员解压完成时其中的内层压缩包
+        self.finished = set() # 全部完成的最外层压缩包
+        self.folders = {}     # 嵌套压缩包 -> 分配的子文件夹
+        self.done = {}        # 已解压完成的嵌套压缩包 -> 其中的内层压缩包
+        self.members = {}     # 已完整写出的文件 -> 大小
+        self._init_writer()
+        if resume:
+            self._load()
+        elif os.path.exists(self.path):
+            os.remove(self.path)
+
+    def _init_writer(self):
+        self._lock = threading.Lock()
+        self._fd = None
+        self._buffer = []
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for name in ('_lock', '_fd', '_buffer'):
+            del state[name]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_writer()
+
+    def for_folder(self, folder):
+        """传给子进程的精简副本：只包含该文件夹内的记录"""
+        prefix = os.path.abspath(folder) + os.sep
+        view = ExtractionJournal.__new__(ExtractionJournal)
+        view.__setstate__(dict(self.__getstate__(), targets={}, extracted={}, finished=set(), done={},
+                               folders={k: v for k, v in self.folders.items() if k.startswith(prefix)},
+                               members={k: v for k, v in self.members.items() if k.startswith(prefix)}))
+        return view
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # 中断时写了一半的行
+                op, path = record.get('op'), record.get('path')
+                if op == 'member':
+                    self.members[path] = record['size']
+                elif op == 'folder':
+                    self.folders[path] = record['folder']
+                elif op == 'done':
+                    self.done[path] = record['inner']
+                elif op == 'begin':
+                    self.targets[path] = record['target']
+                elif op == 'extracted':
+                    self.extracted[path] = record['nested']
+                elif op == 'finish':
+                    self.finished.add(path)
+
+    def _write(self, record, sync=True):
+        with self._lock:
+            self._buffer.append(json.dumps(record, ensure_ascii=False) + '\n')
+            if sync or len(self._buffer) >= self.MEMBER_FLUSH_EVERY:
+                self._flush_locked(sync)
+
+    def _flush_locked(self, sync=False):
+        if not self._buffer:
+            return
+        if self._fd is None:
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        os.write(self._fd, ''.join(self._buffer).encode('utf-8'))
+        self._buffer = []
+        if sync:
+            os.fsync(self._fd)
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked(True)
+
+    def close(self):
+        with self._lock:
+            self._flush_locked(True)
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+    def record_begin(self, archive, target):
+        self._write({'op': 'begin', 'path': os.path.abspath(archive), 'target': os.path.abspath(target)})
+
+    def record_extracted(self, archive, nested):
+        self._write({'op': 'extracted', 'path': os.path.abspath(archive),
+                     'nested': [os.path.abspath(p) for p in nested]})
+
+    def record_finish(self, archive):
+        self._write({'op': 'finish', 'path': os.path.abspath(archive)})
+
+    def record_folder(self, archive, folder):
+        self._write({'op': 'folder', 'path': os.path.abspath(archive), 'folder': os.path.abspath(folder)})
+
+    def record_done(self, archive, inner):
+        self._write({'op': 'done', 'path': os.path.abspath(archive),
+                     'inner': [os.path.abspath(p) for p in inner]})
+
+    def record_member(self, path, size):
+        self._write({'op': 'member', 'path': os.path.abspath(path), 'size': size}, sync=False)
+
+    def target_of(self, archive):
+        return self.targets.get(os.path.abspath(archive))
+
+    def nested_of(self, archive):
+        return self.extracted.get(os.path.abspath(archive))
+
+    def is_finished(self, archive):
+        return os.path.abspath(archive) in self.finished
+
+    def folder_of(self, archive):
+        return self.folders.get(os.path.abspath(archive))
+
+    def inner_of(self, archive):
+        return self.done.get(os.path.abspath(archive))
+
+    def in_target(self, path):
+        """path 是否位于上次某个最外层压缩包的解压目录中"""
+        path = os.path.abspath(path)
+        return any(path.startswith(target + os.sep) for target in self.targets.values())
+
+    def member_complete(self, path, size):
+        """上次已完整写出且大小一致的成员可以跳过"""
+        path = os.path.abspath(path)
+        if self.members.get(path) != size:
+            return False
+        try:
+            return os.path.getsize(path) == size
+        except OSError:
+            return False
+
 
 class Extractor:
     def __init__(self):
@@ -26,99 +1155,871 @@ class Extractor:
         self.extracted_dirs = []
         self.compressed_files = []
         self.compression_thread = None
-        self.progress_callback = None
+        self.progress_callback = None       # 文本进度回调，参数为字符串
+        self.event_callback = None          # 结构化进度回调，参数为 ProgressEvent
         self.keep_original_archives = False  # 是否保留原始压缩包
         self.flatten_single_folder = True   # 是否展平单层文件夹
+        self.in_memory_nested = False       # 是否直接从父压缩包的成员流解压嵌套压缩包（内层压缩包不落盘）
+        self.spill_threshold = 64 * 1024 * 1024  # 内存解压时，超过该大小的内层压缩包溢出到临时文件
+        self._listing_cache = OrderedDict()  # (路径, 大小, 修改时间) -> ArchiveListing，LRU
+        self._format_cache = OrderedDict()  # (路径, 大小, 修改时间) -> 识别出的压缩格式，LRU
+        self.listing_cache_size = 256       # 缓存的压缩包目录个数
+        self.format_cache_size = 4096       # 缓存的格式识别结果个数
+        self._cache_lock = threading.Lock()  # 解压线程并发访问上面两个缓存
+        # 扩展名不是压缩包、只按文件头识别出的文件（.docx/.jar/.xlsb/.npz 等）：'skip' 保持原样；
+        # 'extract' 展开扩展名或内容表明是文档/安装包容器的ZIP；'extract_all' 展开所有按文件头识别出的压缩包
+        self.zip_container_policy = 'skip'
+        self.parallel_workers = 1           # 并行解压同级嵌套压缩包的进程数，1表示串行
+        self.zip_threads = 1                # 单个ZIP包内并行解压成员的线程数，1表示串行
+        self.decompress_threads = 1         # tar.gz/tar.bz2 分段并行解压的线程数，1表示串行
+        self.sevenzip_workers = 1           # 按文件夹（固实块）并行解压单个7z包的进程数，1表示串行
+        self.compress_threads = 1           # 压缩ZIP时并行deflate成员/zstd压缩的线程数，1表示单线程
+        self.compress_level = None          # tar.zst/tar.lz4 的压缩级别，None 使用各自的默认级别
+        self.backend = 'python'             # 首选解压后端：'python'/'7z'/'bsdtar'/'unrar'，'auto' 按实测速度选择
+        self._backend_speed = {}            # (格式, 后端) -> 实测解压速度（压缩包字节/秒）
+        self.adaptive_compression = True    # 已压缩的数据（按扩展名和采样块试压缩判断）直接存储，不再压缩
+        self.compress_stats = {'stored_files': 0, 'stored_bytes': 0, 'cpu_seconds_saved': 0.0}
+        self._stats_lock = threading.Lock()  # 压缩线程并发更新 compress_stats
+        self._compress_costs = {}           # 格式 -> 每字节压缩耗时（CPU秒），每次运行每种格式只测一次
+        self.dedup_nested = False           # 内容相同的嵌套压缩包只解压一次，其余位置用reflink/硬链接填充
+        self._dedup_index = {}              # 压缩包指纹 -> 第一次解压的 (压缩包, 子文件夹)
+        self.dedup_stats = {'archives': 0, 'files': 0, 'bytes_saved': 0, 'seconds_saved': 0.0}
+        self.catalog = None                 # ExtractionCatalog，设置后记录每个解压出的文件
+        self._catalog_rows = None           # 子进程中暂存目录行，交给主进程写入
+        self._origins = {}                  # 解压目录 -> (嵌套链, 来源压缩包, 最外层压缩包, 深度)
+        self.path_filter = None             # PathFilter，设置后只解压逻辑嵌套路径匹配的成员
+        self._logical_dirs = {}             # 解压目录 -> (其压缩包的逻辑路径, 是否整包保留)
+        self._logical_paths = {}            # 展平后移动过的内层压缩包 -> (逻辑路径, 是否整包保留)
+        self.journal = None                 # ExtractionJournal，设置后记录进度，中断后可续传
+        self.rollback_on_failure = True     # 终止或出错时是否删除已解压的内容（续传需要保留）
+        self.copy_chunk_size = 1024 * 1024  # 复制数据的块大小：每块检查一次暂停/终止并报告字节数
+        self.read_cache_size = 8            # open_nested 缓存的内层压缩包个数（LRU）
+        self._read_cache = OrderedDict()    # (外层压缩包缓存键, 各层成员名...) -> 内层压缩包来源
+        self._read_lock = threading.Lock()
 
     def _sanitize_path(self, path):
         return os.path.normpath(path)
 
     def extract_archive(self, file_path, extract_to):
-        base_name = os.path.splitext(os.path.basename(file_path))[0]
-        safe_base_name = self._sanitize_filename(base_name)
-        
-        # 检查压缩包内结构，确定目标目录
-        target_dir = self._determine_target_directory(file_path, extract_to, safe_base_name)
-        
-        orig_target_dir = target_dir
-        count = 1
-        while os.path.exists(target_dir):
-            target_dir = f"{orig_target_dir}_{count}"
-            count += 1
+        if self.journal is not None and self.journal.is_finished(file_path):
+            self._show_progress(f"续传: {os.path.basename(file_path)} 上次已全部完成，跳过")
+            return
+        target_dir = self.journal.target_of(file_path) if self.journal is not None else None
+        if target_dir is None:
+            base_name = os.path.splitext(os.path.basename(file_path))[0]
+            safe_base_name = self._sanitize_filename(base_name)
+            
+            # 检查压缩包内结构，确定目标目录
+            target_dir = self._determine_target_directory(file_path, extract_to, safe_base_name)
+            
+            orig_target_dir = target_dir
+            count = 1
+            while os.path.exists(target_dir):
+                target_dir = f"{orig_target_dir}_{count}"
+                count += 1
+            if self.journal is not None:
+                self.journal.record_begin(file_path, target_dir)
+        # 续传时沿用上次的目标目录
         os.makedirs(target_dir, exist_ok=True)
         self.extracted_dirs.append(target_dir)
+        self._register_origin(file_path, target_dir)
+        self._register_logical(file_path, target_dir)
         self._show_progress(f"正在解压: {os.path.basename(file_path)}")
         
-        try:
-            if file_path.lower().endswith('.zip'):
-                with zipfile.ZipFile(file_path, 'r') as zf:
-                    # 设置解压编码为UTF-8，防止中文乱码
-                    for member in zf.infolist():
-                        self._check_stop_and_pause()
-                        # 修正文件名编码
-                        member_filename = self._decode_filename(member.filename)
-                        member_filename = os.path.normpath(member_filename)
-                        if os.path.isabs(member_filename) or '..' in pathlib.PurePath(member_filename).parts:
-                            continue
-                        target_path = os.path.join(target_dir, member_filename)
-                        if member.is_dir():
-                            os.makedirs(target_path, exist_ok=True)
-                        else:
-                            os.makedirs(os.path.dirname(target_path), exist_ok=True)
-                            with zf.open(member) as source, open(target_path, 'wb') as target:
-                                shutil.copyfileobj(source, target)
-            elif has_rar and file_path.lower().endswith('.rar'):
-                with rarfile.RarFile(file_path, 'r') as rf:
-                    for member in rf.infolist():
-                        self._check_stop_and_pause()
-                        member_filename = self._decode_filename(member.filename)
-                        member_filename = os.path.normpath(member_filename)
-                        if os.path.isabs(member_filename) or '..' in pathlib.PurePath(member_filename).parts:
-                            continue
-                        try:
-                            rf.extract(member, target_dir)
-                        except rarfile.BadRarFile as e:
-                            self._show_progress("RAR文件损坏，已跳过。")
-                            continue
-                        except rarfile.PasswordRequired:
-                            self._show_progress("检测到加密RAR包，暂不支持密码解压，已跳过。")
-                            continue
-            elif file_path.lower().endswith('.7z'):
-                with py7zr.SevenZipFile(file_path, mode='r') as zf:
-                    self._check_stop_and_pause()
-                    try:
-                        zf.extractall(target_dir)
-                    except py7zr.exceptions.PasswordRequired:
-                        self._show_progress("检测到加密7z包，暂不支持密码解压，已跳过。")
-            elif file_path.lower().endswith(('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2')):
-                with tarfile.open(file_path, 'r:*') as tf:
-                    for member in tf.getmembers():
-                        self._check_stop_and_pause()
-                        member_name = self._decode_filename(member.name)
-                        member_name = os.path.normpath(member_name)
-                        if os.path.isabs(member_name) or '..' in pathlib.PurePath(member_name).parts:
-                            continue
-                        try:
-                            tf.extract(member, target_dir)
-                        except Exception as e:
-                            self._show_progress(f"tar解压异常: {e}")
-                            continue
-            else:
-                raise Exception(f"不支持的压缩格式: {file_path}")
-        except Exception as e:
-            self._show_progress("")
-            raise Exception(f"{file_path} 解压失败: {e}")
+        nested = self.journal.nested_of(file_path) if self.journal is not None else None
+        if nested is None:
+            written = self._extract_top_level(file_path, target_dir)
 
-        # 优化解压后的文件夹结构
-        self.optimize_extracted_structure(target_dir)
+            # 优化解压后的文件夹结构
+            moves = self.optimize_extracted_structure(target_dir)
+            crcs = self._member_crcs(file_path, target_dir, moves)
+            self._remember_logical(written, moves)
+            written = self._remap_paths(written, moves)
+            nested = self._archives_in(written)
+            self._catalog_files(written, nested, crcs)
+            if self.journal is not None:
+                self.journal.record_extracted(file_path, nested)
+        else:
+            self._show_progress(f"续传: {os.path.basename(file_path)} 已解压完成，继续处理嵌套压缩包")
         
         # 处理嵌套压缩包
+        failed = set()
         if not self._stop.is_set():
-            self.extract_nested_archives(target_dir)
+            failed = self.extract_nested_archives(target_dir, nested)
             
         # 清理原始压缩包（如果需要）
         if not self.keep_original_archives and not self._stop.is_set():
-            self._cleanup_extracted_archives(target_dir, file_path)
+            self._cleanup_extracted_archives(target_dir, file_path, failed)
+        if self.journal is not None and not self._stop.is_set():
+            self.journal.record_finish(file_path)
+
+    def _extract_top_level(self, file_path, target_dir):
+        """解压最外层压缩包的成员，返回写出的文件路径"""
+        written = []  # 本次解压写出的文件，用于直接找出内层压缩包
+        try:
+            fmt = self._detect_format(file_path)
+            if fmt not in FORMAT_HANDLERS:
+                raise Exception(f"不支持的压缩格式: {file_path}")
+            tracker = self._format_tracker(fmt, 'extract', file_path, 0, target_dir)
+            self._extract_with_backends(fmt, file_path, target_dir, written, tracker)
+        except Exception as e:
+            self._show_progress("")
+            raise Exception(f"{file_path} 解压失败: {e}")
+        return written
+
+    def _format_tracker(self, fmt, phase, archive, depth, target_dir=None):
+        """能直接读取目录的格式按目录统计总量；tar 的目录分散在整个数据流中，读取目录等于完整解压一遍，总量未知"""
+        if FORMAT_HANDLERS[fmt].listable:
+            return self._listing_tracker(phase, archive, depth=depth, target_dir=target_dir)
+        return self._tracker(phase, archive, depth=depth)
+
+    def _backend_order(self, fmt):
+        """该格式可用的解压后端，按尝试顺序排列：首选后端在前，其余作为失败时的回退；
+        'auto' 时还没测过速度的后端先各试一次，之后按实测速度从快到慢"""
+        handler = FORMAT_HANDLERS[fmt]
+        available = [b for b in handler.backends if self._backend_available(fmt, b)]
+        if self.backend == 'auto':
+            untried = [b for b in available if (fmt, b) not in self._backend_speed]
+            tried = sorted((b for b in available if (fmt, b) in self._backend_speed),
+                           key=lambda b: self._backend_speed[(fmt, b)], reverse=True)
+            return untried + tried
+        if self.backend in available:
+            available.remove(self.backend)
+            available.insert(0, self.backend)
+        return available
+
+    def _backend_available(self, fmt, backend):
+        """后端是否可用：纯Python后端要求对应的库能导入，外部后端要求能找到程序"""
+        if backend == 'python':
+            return {'rar': _has_rar, '7z': lambda: _has_module('py7zr')}.get(fmt, lambda: True)()
+        return _find_tool(backend) is not None
+
+    def _extract_with_backends(self, fmt, file_path, target_dir, written, tracker):
+        """按 _backend_order 依次尝试各后端解压，成功后记录实测速度；后端出错时换下一个，全部失败时抛出最后的错误。
+        可能换后端或用到外部程序时，在第一次尝试前记下目标目录已有的文件，失败的后端留下的文件也算作本次写出"""
+        backends = self._backend_order(fmt)
+        if not backends:
+            raise Exception(f"不支持的压缩格式: {file_path}（缺少可用的解压库或程序）")
+        existing = None
+        if len(backends) > 1 or backends[0] != 'python':
+            existing = set(self._files_under(os.path.abspath(target_dir)))
+        error = None
+        for backend in backends:
+            attempt = []
+            start = time.monotonic()
+            try:
+                if backend == 'python':
+                    getattr(self, FORMAT_HANDLERS[fmt].extract)(file_path, target_dir, attempt, tracker)
+                else:
+                    self._extract_external(backend, file_path, target_dir, attempt, tracker, existing)
+            except Exception as e:
+                if self._stop.is_set():
+                    raise
+                error = e
+                self._show_progress(f"{backend} 解压 {os.path.basename(file_path)} 失败，尝试其他方式: {e}")
+                continue
+            if error is not None:
+                # 前面失败的后端已写出、这次没有覆盖到的文件（其中可能有内层压缩包）
+                seen = {os.path.abspath(path) for path in attempt}
+                attempt.extend(path for path in self._new_files(target_dir, existing)
+                               if os.path.abspath(path) not in seen)
+            written.extend(attempt)
+            elapsed = time.monotonic() - start
+            if elapsed > 0:
+                speed = os.path.getsize(file_path) / elapsed
+                previous = self._backend_speed.get((fmt, backend))
+                # 指数平均，避免单个压缩包的偶然快慢决定后续选择
+                self._backend_speed[(fmt, backend)] = speed if previous is None else previous * 0.7 + speed * 0.3
+            return
+        raise error
+
+    def _extract_external(self, backend, file_path, target_dir, written, tracker, existing):
+        """调用外部程序整包解压，等待期间可暂停/终止（终止时结束子进程）；existing 为解压前目标目录已有的文件。
+        外部程序自行处理路径安全，不做GBK文件名修正，也不支持按成员续传、内存嵌套解压和解压前筛选成员"""
+        abs_target = os.path.abspath(target_dir)
+        os.makedirs(abs_target, exist_ok=True)
+        command = EXTERNAL_BACKENDS[backend][1](_find_tool(backend), os.path.abspath(file_path), abs_target)
+        self._run_tool(command)
+        paths = self._new_files(target_dir, existing)
+        written.extend(paths)
+        if tracker is not None:
+            tracker.advance(None, sum(os.path.getsize(path) for path in paths), len(paths))
+
+    def _run_tool(self, command, on_line=None):
+        """运行外部程序，逐行把输出（合并标准错误）交给 on_line；等待期间可暂停/终止（终止时结束子进程），
+        退出码非0时抛出异常，附带最后一行输出"""
+        process = subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                                   stderr=subprocess.STDOUT, env=_tool_env())
+        lines = queue.Queue()
+
+        def read():
+            for raw in process.stdout:
+                lines.put(raw.decode('utf-8', errors='replace').rstrip('\r\n'))
+            lines.put(None)
+
+        reader = threading.Thread(target=read, daemon=True)
+        reader.start()
+        last = ''
+        checked = time.monotonic()
+        try:
+            while True:
+                # 按时间间隔检查暂停/终止，输出很多的程序也能及时停下
+                if time.monotonic() - checked >= 0.1:
+                    self._check_stop_and_pause()
+                    checked = time.monotonic()
+                try:
+                    line = lines.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if line is None:
+                    break
+                if line.strip():
+                    last = line.strip()
+                if on_line is not None:
+                    on_line(line)
+            process.wait()
+        except BaseException:
+            process.kill()
+            process.wait()
+            raise
+        finally:
+            reader.join()
+            process.stdout.close()
+        if process.returncode != 0:
+            raise Exception(f"退出码 {process.returncode}: {last}")
+
+    def _new_files(self, target_dir, existing):
+        """目标目录中不在 existing 里的文件（路径以 target_dir 开头）；外部程序不支持按逻辑路径筛选，
+        这些文件中不需要的直接删除"""
+        abs_target = os.path.abspath(target_dir)
+        paths = [os.path.join(target_dir, os.path.relpath(path, abs_target))
+                 for path in self._files_under(abs_target) if path not in existing]
+        if self.path_filter is not None:
+            for path in paths:
+                if not self._wanted(path):
+                    self._safe_remove(path)
+            paths = [path for path in paths if os.path.exists(path)]
+        return paths
+
+    def _files_under(self, folder):
+        """文件夹下所有文件的路径"""
+        return [os.path.join(root, name) for root, _, names in os.walk(folder) for name in names]
+
+    def _extract_zip_file(self, file_path, target_dir, written=None, tracker=None):
+        """纯Python后端：解压ZIP文件，开启多线程时按区段并行"""
+        members = self._list_archive(file_path).infos
+        try:
+            if self.zip_threads > 1:
+                self._extract_zip_parallel(file_path, target_dir, members, written, tracker)
+            else:
+                with zipfile.ZipFile(file_path, 'r') as zf:
+                    self._extract_zip_members(zf, target_dir, members=members, written=written, tracker=tracker)
+        except RuntimeError as e:
+            if 'password required' not in str(e).lower():
+                raise
+            self._show_progress("检测到加密压缩包，暂不支持密码解压，已跳过。")
+
+    def _extract_7z_file(self, file_path, target_dir, written=None, tracker=None):
+        """纯Python后端：用 py7zr 解压7z文件，设置了 sevenzip_workers 时按文件夹（固实块）多进程并行解压"""
+        if self.sevenzip_workers > 1 and self._extract_7z_parallel(file_path, target_dir, written, tracker):
+            return
+        with py7zr.SevenZipFile(file_path, mode='r') as zf:
+            self._check_stop_and_pause()
+            try:
+                self._extract_7z(zf, target_dir, written, tracker)
+            except py7zr.exceptions.PasswordRequired:
+                self._show_progress("检测到加密7z包，暂不支持密码解压，已跳过。")
+
+    def _extract_7z_parallel(self, file_path, target_dir, written=None, tracker=None):
+        """7z 的各个文件夹（固实块）相互独立：读取文件头，按解压后大小从大到小把文件夹分给负载最小的进程，
+        各进程只解压分到的文件夹；非固实压缩包每个文件自成一个文件夹，相当于按文件分配。
+        目录、符号链接、修改时间和权限由主进程统一处理，结果与 extractall 一致。
+        加密、文件夹少于2个或有同名成员时返回False，改为串行解压"""
+        with py7zr.SevenZipFile(file_path, mode='r') as zf:
+            streams = zf.header.main_streams
+            folders = streams.unpackinfo.folders if streams is not None else []
+            names = [f.filename for f in zf.files]
+            if getattr(getattr(py7zr, 'io', None), 'WriterFactory', None) is None:
+                return False  # 旧版本 py7zr 不支持 factory 参数
+            if zf.needs_password() or len(folders) < 2 or len(set(names)) != len(names):
+                return False
+            abs_target = os.path.abspath(target_dir)
+            # 设置了 path_filter 时只解压匹配的成员，没有匹配成员的文件夹不分配
+            outputs = [(f, path) for f, path in _sevenzip_outputs(zf, abs_target)
+                       if self._wanted(str(path), f.is_directory)]
+            wanted = {f.filename for f, _ in outputs}
+            created = self._make_7z_dirs(outputs)
+            bins = [[0, []] for _ in range(min(self.sevenzip_workers, len(folders)))]
+            for folder in sorted(folders, key=lambda fd: -sum(f.uncompressed or 0 for f in fd.files)):
+                members = [f.filename for f in folder.files if not f.is_directory and f.filename in wanted]
+                if members:
+                    load = min(bins, key=lambda b: b[0])
+                    load[0] += sum(f.uncompressed or 0 for f in folder.files)
+                    load[1].extend(members)
+            # 空文件不属于任何文件夹，交给第一个进程
+            bins[0][1].extend(f.filename for f in zf.files
+                              if f.emptystream and not f.is_directory and f.filename in wanted)
+            paths = set()
+            with self._process_control() as (manager, stop_event, pause_event, _):
+                bytes_queue = manager.Queue()
+
+                def drain():
+                    while True:
+                        try:
+                            nbytes = bytes_queue.get_nowait()
+                        except queue.Empty:
+                            return
+                        if tracker is not None:
+                            tracker.advance(None, nbytes, files=0)
+
+                with concurrent_futures.ProcessPoolExecutor(max_workers=len(bins)) as pool:
+                    running = [pool.submit(_sevenzip_folders_worker, file_path, abs_target, members,
+                                           stop_event, pause_event, bytes_queue)
+                               for _, members in bins if members]
+                    error = None
+                    while running:
+                        done, _ = concurrent_futures.wait(running, timeout=0.1,
+                                                          return_when=concurrent_futures.FIRST_COMPLETED)
+                        drain()
+                        for future in done:
+                            running.remove(future)
+                            try:
+                                paths.update(future.result())
+                            except Exception as e:
+                                # 一个进程出错时让其余进程尽快停止
+                                if error is None:
+                                    error = e
+                                    stop_event.set()
+                    drain()
+            self._check_stop_and_pause()
+            if error is not None:
+                raise error
+            self._finish_7z(outputs, created, abs_target)
+        written_paths = [os.path.join(target_dir, os.path.relpath(str(path), abs_target))
+                         for _, path in outputs if os.path.normpath(str(path)) in paths]
+        if tracker is not None:
+            tracker.advance(None, 0, len(written_paths))
+        if written is not None:
+            written.extend(written_paths)
+        return True
+
+    def _make_7z_dirs(self, outputs):
+        """与 extractall 相同，在写出文件前创建目录成员；返回新建的目录，已存在的目录之后不修改属性"""
+        created = [(f, path) for f, path in outputs if f.is_directory and not path.exists()]
+        for _, path in sorted(created, key=lambda item: item[1]):
+            path.mkdir(parents=True, exist_ok=True)
+        return created
+
+    def _finish_7z(self, outputs, created, target):
+        """factory 模式下 py7zr 把符号链接写成内容为链接目标的普通文件，也不恢复属性：
+        按 extractall 的方式还原符号链接，再给普通文件和新建目录设置修改时间和权限"""
+        created = {id(f) for f, _ in created}
+        for f, path in outputs:
+            if f.is_symlink and not f.emptystream and path.is_file() and not path.is_symlink():
+                link = path.read_text(encoding='utf-8')
+                if not py7zr.helpers.is_path_valid(path.parent.joinpath(link), pathlib.Path(target)):
+                    raise Exception(f"7z中的符号链接指向解压目录之外: {f.filename} -> {link}")
+                path.unlink()
+                path.symlink_to(link)
+        for f, path in outputs:
+            if f.is_directory:
+                if id(f) not in created:
+                    continue
+            elif f.is_symlink or f.is_junction or f.is_socket or not path.exists():
+                continue
+            properties = f.file_properties()
+            lastwritetime = properties.get('lastwritetime')
+            if lastwritetime is not None:
+                mtime = py7zr.helpers.ArchiveTimestamp(lastwritetime).totimestamp()
+                os.utime(path, (mtime, mtime))
+            if os.name == 'posix' and properties['posix_mode'] is not None:
+                path.chmod(properties['posix_mode'])
+            elif properties['readonly'] and not properties['is_directory']:
+                path.chmod(path.stat().st_mode & (0o777 ^ 0o222))
+
+    def _extract_rar_file(self, file_path, target_dir, written=None, tracker=None):
+        """纯Python后端：用 rarfile 读取目录，能找到批量解压程序时一次调用解压全部成员，否则逐个成员解压"""
+        try:
+            with rarfile.RarFile(file_path, 'r') as rf:
+                if rf.needs_password():
+                    raise rarfile.PasswordRequired()
+                if self._extract_rar_batch(file_path, rf.infolist(), target_dir, written, tracker):
+                    return
+                self._extract_rar_members(rf, target_dir, written, tracker)
+        except rarfile.PasswordRequired:
+            self._show_progress("检测到加密RAR包，暂不支持密码解压，已跳过。")
+
+    def _extract_rar_batch(self, file_path, infos, target_dir, written=None, tracker=None):
+        """用一次外部程序调用解压RAR中所有安全的成员：rarfile 逐个成员解压时每个成员都要启动一次 unrar，
+        固实压缩包每次还要从头解压。有成员被过滤（不安全路径、续传时已完成、不匹配 path_filter）时通过列表文件只解压其余成员，
+        按程序输出的文件名逐个报告进度。找不到批量解压程序、或列表中的名称含通配符时返回False"""
+        tool = next((name for name in RAR_BATCH_TOOLS if _find_tool(name)), None)
+        if tool is None:
+            return False
+        build_command, parse_line = RAR_BATCH_TOOLS[tool]
+        pending = {}  # 规范化的成员名 -> (目标路径, 大小)
+        names = []
+        done = []     # 续传时已完成的 (目标路径, 成员名, 大小)
+        filtered = False
+        for info in infos:
+            member_filename = os.path.normpath(self._decode_filename(info.filename))
+            if os.path.isabs(member_filename) or '..' in pathlib.PurePath(member_filename).parts:
+                filtered = True
+                continue
+            # 外部程序按压缩包中的原始文件名写出
+            name = os.path.normpath(info.filename)
+            target_path = os.path.join(target_dir, name)
+            if not self._wanted(target_path, info.is_dir()):
+                filtered = True
+                continue
+            if info.is_dir():
+                os.makedirs(target_path, exist_ok=True)
+                continue
+            if self._member_done(target_path, info.file_size):
+                filtered = True
+                done.append((target_path, member_filename, info.file_size))
+                continue
+            pending[name] = (target_path, info.file_size)
+            names.append(info.filename)
+        if filtered and any(c in name for name in names for c in '*?['):
+            # 列表文件中的名称会被外部程序当作通配符，可能匹配到被过滤掉的成员，改为逐个成员解压
+            return False
+        for target_path, member_filename, size in done:
+            if written is not None:
+                written.append(target_path)
+            if tracker is not None:
+                tracker.advance(member_filename, size)
+        if not pending:
+            return True
+
+        def on_line(line):
+            name = parse_line(line)
+            entry = pending.pop(os.path.normpath(name), None) if name else None
+            if entry is not None:
+                self._finish_rar_member(name, entry, written, tracker)
+
+        abs_target = os.path.abspath(target_dir)
+        os.makedirs(abs_target, exist_ok=True)
+        listfile = None
+        try:
+            if filtered:
+                fd, listfile = tempfile.mkstemp(suffix='.lst')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write('\n'.join(names) + '\n')
+            self._run_tool(build_command(_find_tool(tool), os.path.abspath(file_path), abs_target, listfile), on_line)
+        finally:
+            if listfile is not None:
+                self._safe_remove(listfile)
+        # 输出中没能对上的成员（如程序输出的编码不同）最后统一登记
+        for name, entry in list(pending.items()):
+            if os.path.exists(entry[0]):
+                self._finish_rar_member(name, entry, written, tracker)
+        return True
+
+    def _finish_rar_member(self, name, entry, written, tracker):
+        """登记批量解压写出的一个RAR成员"""
+        target_path, size = entry
+        self._member_written(target_path, size)
+        if written is not None:
+            written.append(target_path)
+        if tracker is not None:
+            tracker.advance(name, size)
+
+    def _safe_member_name(self, name):
+        """解码并规范化成员名，不安全的路径（绝对路径或包含..）返回None"""
+        member_name = os.path.normpath(self._decode_filename(name))
+        if os.path.isabs(member_name) or '..' in pathlib.PurePath(member_name).parts:
+            return None
+        return member_name
+
+    def _extract_zip_members(self, zf, target_dir, members=None, abort=None, written=None, tracker=None):
+        """逐个解压ZIP成员，开启内存模式时嵌套压缩包直接从成员流解压；abort被设置时提前结束，
+        写出的文件路径追加到written中，进度记录到tracker"""
+        for member in (members if members is not None else zf.infolist()):
+            self._check_stop_and_pause()
+            if abort is not None and abort.is_set():
+                return
+            # 修正文件名编码
+            member_filename = self._safe_member_name(member.filename)
+            if member_filename is None:
+                continue
+            target_path = os.path.join(target_dir, member_filename)
+            if not self._wanted(target_path, member.is_dir()):
+                continue
+            if member.is_dir():
+                os.makedirs(target_path, exist_ok=True)
+            elif self.in_memory_nested and self._is_supported_archive(member_filename):
+                os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                with self._open_zip_member(zf, member) as source:
+                    self._extract_nested_stream(source, target_path, written, self._child_depth(tracker))
+            else:
+                copied = 0
+                if not self._member_done(target_path, member.file_size):
+                    copied = self._write_zip_member(zf, member, target_path, member_filename, tracker)
+                    self._member_written(target_path, member.file_size)
+                if written is not None:
+                    written.append(target_path)
+                if tracker is not None:
+                    # 复制过程中已经按块报告了字节数
+                    tracker.advance(member_filename, member.file_size - copied)
+                continue
+            if tracker is not None and not member.is_dir():
+                tracker.advance(member_filename, member.file_size)
+
+    def _extract_zip_parallel(self, file_path, target_dir, members, written=None, tracker=None):
+        """多线程解压ZIP成员：按本地文件头偏移排序后切成压缩数据量相近的连续区段，
+        每个线程持有独立的ZipFile句柄顺序读取自己的区段（zlib解压时会释放GIL）"""
+        dirs = [m for m in members if m.is_dir()]
+        members = sorted((m for m in members if not m.is_dir()), key=lambda m: m.header_offset)
+        total = sum(m.compress_size for m in members)
+        workers = max(1, min(self.zip_threads, len(members)))
+        chunks = []
+        chunk = []
+        chunk_size = 0
+        for member in members:
+            chunk.append(member)
+            chunk_size += member.compress_size
+            if len(chunks) < workers - 1 and chunk_size >= total / workers:
+                chunks.append(chunk)
+                chunk = []
+                chunk_size = 0
+        if chunk:
+            chunks.append(chunk)
+
+        abort = threading.Event()
+
+        def run(chunk):
+            with zipfile.ZipFile(file_path, 'r') as zf:
+                try:
+                    self._extract_zip_members(zf, target_dir, members=chunk, abort=abort, written=written,
+                                              tracker=tracker)
+                except Exception:
+                    abort.set()
+                    raise
+
+        # 目录成员由当前线程先创建
+        with zipfile.ZipFile(file_path, 'r') as zf:
+            self._extract_zip_members(zf, target_dir, members=dirs)
+        with concurrent_futures.ThreadPoolExecutor(max_workers=len(chunks) or 1) as pool:
+            futures = [pool.submit(run, chunk) for chunk in chunks]
+            errors = [f.exception() for f in futures]
+        for error in errors:
+            if error is not None:
+                raise error
+
+    def _extract_tar_stream(self, file_path, target_dir, written=None, tracker=None):
+        """单遍流式解压tar（含 .tar.gz/.tar.bz2/.tar.xz）：按'r|*'模式顺序读取，
+        边读头部边做路径安全检查和文件名解码，整个数据流只解压一次；
+        开启并行解压且gzip/bzip2数据流能分段时，由多个线程解压、按顺序交给tar读取"""
+        stream = None
+        if self.decompress_threads > 1:
+            stream = _open_parallel_decompress(file_path, self.decompress_threads)
+        if stream is None:
+            stream = _tar_decompressor(file_path)
+        if stream is None:
+            with tarfile.open(file_path, 'r|*') as tf:
+                self._extract_tar_members(tf, target_dir, written=written, tracker=tracker)
+            return
+        with stream, tarfile.open(fileobj=stream, mode='r|') as tf:
+            self._extract_tar_members(tf, target_dir, written=written, tracker=tracker)
+
+    def _extract_tar_members(self, tf, target_dir, written=None, tracker=None):
+        """按头部到达顺序逐个解压TAR成员（tf 可以是'r|*'流模式打开的），开启内存模式时嵌套压缩包直接从成员流解压，
+        写出的文件路径追加到written中，进度记录到tracker"""
+        for member in tf:
+            self._check_stop_and_pause()
+            # 修正文件名编码
+            member.name = self._decode_filename(member.name)
+            member_name = self._safe_member_name(member.name)
+            if member_name is None or not self._wanted(os.path.join(target_dir, member_name), member.isdir()):
+                continue
+            try:
+                if self.in_memory_nested and member.isfile() and self._is_supported_archive(member_name):
+                    target_path = os.path.join(target_dir, member_name)
+                    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                    with tf.extractfile(member) as source:
+                        self._extract_nested_stream(source, target_path, written, self._child_depth(tracker))
+                else:
+                    target_path = os.path.join(target_dir, member_name)
+                    copied = self._extract_tar_member(tf, member, target_dir, target_path, member_name, tracker)
+                    if written is not None and member.isfile():
+                        written.append(target_path)
+                    if tracker is not None and member.isfile():
+                        tracker.advance(member_name, member.size - copied)
+                    continue
+                if tracker is not None and member.isfile():
+                    tracker.advance(member_name, member.size)
+            except Exception as e:
+                self._show_progress(f"tar解压异常: {e}")
+                continue
+
+    def _copy_stream(self, source, target, member=None, tracker=None):
+        """分块复制数据：每块之前检查暂停/终止，每块之后向tracker报告字节数（不计文件数），
+        单个很大的成员也能在一块的时间内暂停/终止。返回复制的字节数"""
+        copied = 0
+        while True:
+            self._check_stop_and_pause()
+            chunk = source.read(self.copy_chunk_size)
+            if not chunk:
+                return copied
+            target.write(chunk)
+            copied += len(chunk)
+            if tracker is not None:
+                tracker.advance(member, len(chunk), files=0)
+
+    def _stored_location(self, zf, member):
+        """不压缩、不加密的ZIP成员返回 (磁盘文件路径, 文件描述符, 数据在该文件中的偏移)，否则返回None。
+        ZipFile 需直接打开磁盘文件或外层文件上的窗口（内存中的ZipFile无法零拷贝）"""
+        if member.compress_type != zipfile.ZIP_STORED or member.flag_bits & 0x1 or not hasattr(os, 'pread'):
+            return None
+        fp = getattr(zf, 'fp', None)
+        if isinstance(fp, _FileWindow):
+            # 窗口里的ZIP：偏移换算到外层磁盘文件
+            path, fd, base = fp.path, fp.fd, fp.offset
+        elif isinstance(fp, io.BufferedReader) and isinstance(zf.filename, str):
+            path, fd, base = zf.filename, fp.fileno(), 0
+        else:
+            return None
+        try:
+            header = os.pread(fd, _ZIP_LOCAL_HEADER.size, base + member.header_offset)
+        except (OSError, ValueError):
+            return None
+        if len(header) != _ZIP_LOCAL_HEADER.size:
+            return None
+        fields = _ZIP_LOCAL_HEADER.unpack(header)
+        if fields[0] != b'PK\x03\x04':
+            return None
+        # 本地文件头中的文件名/扩展字段长度可能与中央目录不同，必须以本地文件头为准
+        return path, fd, base + member.header_offset + _ZIP_LOCAL_HEADER.size + fields[9] + fields[10]
+
+    def _copy_range(self, src_fd, dst_fd, offset, count, member=None, tracker=None):
+        """在内核中分块复制 src_fd 从 offset 开始的 count 字节，每块检查暂停/终止并报告字节数。
+        返回复制的字节数"""
+        copied = 0
+        while copied < count:
+            self._check_stop_and_pause()
+            sent = _kernel_copy(src_fd, dst_fd, offset + copied, min(self.copy_chunk_size, count - copied))
+            if sent <= 0:
+                raise Exception("压缩包数据不完整")
+            copied += sent
+            if tracker is not None:
+                tracker.advance(member, sent, files=0)
+        return copied
+
+    def _write_zip_member(self, zf, member, target_path, member_name=None, tracker=None):
+        """写出一个ZIP文件成员：存储方式的成员在内核中直接复制，其余解压后分块写出。
+        返回已向tracker报告的字节数"""
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        location = self._stored_location(zf, member)
+        if location is not None:
+            _, fd, offset = location
+            with open(target_path, 'wb') as target:
+                copied = self._copy_range(fd, target.fileno(), offset, member.file_size, member_name, tracker)
+            try:
+                self._check_stored_crc(fd, offset, member)
+            except BaseException:
+                self._safe_remove(target_path)
+                raise
+            return copied
+        with zf.open(member) as source, open(target_path, 'wb') as target:
+            return self._copy_stream(source, target, member_name, tracker)
+
+    def _open_zip_member(self, zf, member):
+        """打开ZIP成员用于读取：存储方式的成员返回外层文件上的只读窗口（可随机访问，不复制数据）"""
+        location = self._stored_location(zf, member)
+        if location is not None:
+            path, fd, offset = location
+            self._check_stored_crc(fd, offset, member)
+            return _FileWindow(path, offset, member.file_size)
+        return zf.open(member)
+
+    def _check_stored_crc(self, fd, offset, member):
+        """零拷贝路径不经过 zipfile 的CRC校验：按块读取成员数据计算CRC-32，
+        与目录中记录的不一致时抛出与 zipfile 相同的 BadZipFile"""
+        crc = done = 0
+        while done < member.file_size:
+            self._check_stop_and_pause()
+            chunk = os.pread(fd, min(self.copy_chunk_size, member.file_size - done), offset + done)
+            if not chunk:
+                raise Exception("压缩包数据不完整")
+            crc = zlib.crc32(chunk, crc)
+            done += len(chunk)
+        if crc != member.CRC:
+            raise zipfile.BadZipFile(f"Bad CRC-32 for file {member.filename!r}")
+
+    def _byte_reporter(self, member=None, tracker=None):
+        """返回只报告字节数的回调，供按块读写的包装对象使用"""
+        if tracker is None:
+            return None
+        return lambda nbytes: tracker.advance(member, nbytes, files=0)
+
+    def _extract_tar_member(self, tf, member, target_dir, target_path, member_name=None, tracker=None):
+        """解压一个tar成员：普通文件分块写出并恢复权限和修改时间，其他类型交给tarfile；
+        续传时跳过已完成的文件。返回已向tracker报告的字节数"""
+        if not member.isfile():
+            tf.extract(member, target_dir)
+            return 0
+        if self._member_done(target_path, member.size):
+            return 0
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        with tf.extractfile(member) as source, open(target_path, 'wb') as target:
+            copied = self._copy_stream(source, target, member_name, tracker)
+        try:
+            os.chmod(target_path, member.mode & 0o777)
+            os.utime(target_path, (member.mtime, member.mtime))
+        except OSError:
+            pass
+        self._member_written(target_path, member.size)
+        return copied
+
+    def _extract_rar_members(self, rf, target_dir, written=None, tracker=None):
+        """逐个分块解压RAR成员，跳过不安全路径、损坏和加密的成员"""
+        for member in rf.infolist():
+            self._check_stop_and_pause()
+            member_filename = os.path.normpath(self._decode_filename(member.filename))
+            if os.path.isabs(member_filename) or '..' in pathlib.PurePath(member_filename).parts:
+                continue
+            target_path = os.path.join(target_dir, os.path.normpath(member.filename))
+            if not self._wanted(target_path, member.is_dir()):
+                continue
+            try:
+                if member.is_dir():
+                    os.makedirs(target_path, exist_ok=True)
+                    continue
+                copied = 0
+                if not self._member_done(target_path, member.file_size):
+                    os.makedirs(os.path.dirname(target_path), exist_ok=True)
+                    with rf.open(member) as source, open(target_path, 'wb') as target:
+                        copied = self._copy_stream(source, target, member_filename, tracker)
+                    self._member_written(target_path, member.file_size)
+                if written is not None:
+                    written.append(target_path)
+                if tracker is not None:
+                    tracker.advance(member_filename, member.file_size - copied)
+            except rarfile.BadRarFile:
+                self._show_progress("RAR文件损坏，已跳过。")
+                continue
+            except rarfile.PasswordRequired:
+                self._show_progress("检测到加密RAR包，暂不支持密码解压，已跳过。")
+                continue
+
+    def _extract_7z(self, zf, target_dir, written=None, tracker=None):
+        """解压7z：py7zr 支持 factory 参数时由本程序写出每个文件，写入过程中可暂停/终止并报告字节数；
+        旧版本 py7zr 退回 extractall 整包解压"""
+        infos = zf.list()
+        # 设置了 path_filter 时只解压匹配的成员（py7zr 会跳过不含这些成员的文件夹）
+        targets = None
+        if self.path_filter is not None:
+            targets = {i.filename for i in infos
+                       if self._wanted(os.path.join(target_dir, os.path.normpath(i.filename)), i.is_directory)}
+            infos = [i for i in infos if i.filename in targets]
+        writer_factory = getattr(getattr(py7zr, 'io', None), 'WriterFactory', None)
+        if writer_factory is None:
+            if targets is None:
+                zf.extractall(target_dir)
+            else:
+                zf.extract(target_dir, targets=targets)
+            paths = [os.path.join(target_dir, os.path.normpath(i.filename)) for i in infos if not i.is_directory]
+            if tracker is not None:
+                tracker.advance(None, tracker.bytes_total or 0, tracker.files_total or 0)
+        else:
+            factory = _SevenZipWriterFactory(self._check_stop_and_pause, self._byte_reporter(None, tracker))
+            abs_target = os.path.abspath(target_dir)
+            # factory 模式下目录、符号链接和属性需要自己处理
+            outputs = _sevenzip_outputs(zf, abs_target)
+            if targets is not None:
+                outputs = [(f, path) for f, path in outputs if f.filename in targets]
+            created = self._make_7z_dirs(outputs)
+            if targets is None:
+                zf.extractall(abs_target, factory=factory)
+            else:
+                zf.extract(abs_target, targets=targets, factory=factory)
+            self._finish_7z(outputs, created, abs_target)
+            paths = [os.path.join(target_dir, os.path.relpath(p, abs_target)) for p in factory.paths]
+            if tracker is not None:
+                tracker.advance(None, 0, len(paths))
+        if written is not None:
+            written.extend(paths)
+
+    def _extract_seekable_nested(self, fileobj, fmt, sub_folder, archive_path, written, depth):
+        """从可随机访问的文件对象中解压内层 zip/7z"""
+        if fmt == 'zip':
+            with zipfile.ZipFile(fileobj, 'r') as zf:
+                infos = [i for i in zf.infolist()
+                         if not i.is_dir() and self._wanted(os.path.join(sub_folder, os.path.normpath(i.filename)))]
+                tracker = self._tracker('nested', archive_path, sum(i.file_size for i in infos), len(infos), depth)
+                self._extract_zip_members(zf, sub_folder, written=written, tracker=tracker)
+        else:
+            with py7zr.SevenZipFile(fileobj, mode='r') as zf:
+                try:
+                    infos = [i for i in zf.list() if not i.is_directory and
+                             self._wanted(os.path.join(sub_folder, os.path.normpath(i.filename)))]
+                    tracker = self._tracker('nested', archive_path, sum(i.uncompressed for i in infos),
+                                            len(infos), depth)
+                    self._extract_7z(zf, sub_folder, written, tracker)
+                except py7zr.exceptions.PasswordRequired:
+                    self._show_progress("检测到加密7z包，暂不支持密码解压，已跳过。")
+
+    def _extract_nested_stream(self, source, archive_path, written=None, depth=1):
+        """直接从父压缩包的成员流解压内层压缩包，archive_path 只用于确定解压位置，不会被写入"""
+        sub_folder = self._allocate_sub_folder(archive_path)
+        self._show_progress(f"正在解压嵌套文件: {os.path.basename(archive_path)}")
+
+        # 成员流无法预读文件头，按成员名判断格式
+        fmt = self._format_from_name(archive_path)
+        handler = FORMAT_HANDLERS.get(fmt)
+        inner_written = []
+        try:
+            if handler is None:
+                raise Exception(f"不支持的压缩格式: {archive_path}")
+            if handler.streamable:
+                # tar 可以按流模式顺序读取，无需缓冲
+                # 流模式无法预知总大小
+                tracker = self._tracker('nested', archive_path, depth=depth)
+                stream = _tar_decompressor(source)
+                if stream is None:
+                    with tarfile.open(fileobj=source, mode='r|*') as tf:
+                        self._extract_tar_members(tf, sub_folder, written=inner_written, tracker=tracker)
+                else:
+                    with stream, tarfile.open(fileobj=stream, mode='r|') as tf:
+                        self._extract_tar_members(tf, sub_folder, written=inner_written, tracker=tracker)
+            elif handler.random_access and (fmt != '7z' or _has_module('py7zr')):
+                # zip/7z 需要随机访问：外层文件上的窗口直接使用，不复制；
+                # 其他成员流小于阈值时留在内存，超过阈值自动溢出到临时文件
+                if isinstance(source, _FileWindow):
+                    self._extract_seekable_nested(source, fmt, sub_folder, archive_path, inner_written, depth)
+                else:
+                    with tempfile.SpooledTemporaryFile(max_size=self.spill_threshold) as spool:
+                        self._copy_stream(source, spool)
+                        spool.seek(0)
+                        self._extract_seekable_nested(spool, fmt, sub_folder, archive_path, inner_written, depth)
+            else:
+                # rar 等只能处理磁盘文件的格式（或没有可用的库时交给外部程序），溢出到临时文件
+                fd, temp_path = tempfile.mkstemp(suffix=os.path.splitext(archive_path)[1])
+                try:
+                    with os.fdopen(fd, 'wb') as temp:
+                        self._copy_stream(source, temp)
+                    tracker = self._tracker('nested', archive_path, depth=depth)
+                    self._extract_with_backends(fmt, temp_path, sub_folder, inner_written, tracker)
+                finally:
+                    self._safe_remove(temp_path)
+        except Exception as e:
+            if self._stop.is_set():
+                raise
+            self._show_progress(f"嵌套文件解压失败: {e}")
+            return
+        if self.path_filter is not None and not inner_written:
+            # 没有匹配的成员时不留下空的子文件夹
+            try:
+                os.rmdir(sub_folder)
+            except OSError:
+                pass
+            return
+
+        # 优化解压后的结构
+        moves = self.optimize_extracted_structure(sub_folder)
+        if written is not None:
+            written.extend(self._remap_paths(inner_written, moves))
 
     def _decode_filename(self, filename):
         if isinstance(filename, bytes):
@@ -140,63 +2041,331 @@ class Extractor:
         except Exception:
             return filename
 
-    def _determine_target_directory(self, file_path, extract_to, base_name):
-        """确定解压目标目录，处理同名文件夹和松散文件情况"""
+    def _file_key(self, file_path):
+        """文件缓存键：(绝对路径, 大小, 修改时间)，文件变化后自动失效"""
+        st = os.stat(file_path)
+        return (os.path.abspath(file_path), st.st_size, st.st_mtime_ns)
+
+    def _cache_lookup(self, cache, key):
+        """LRU 缓存查找：命中时标记为最近使用并返回 (True, 值)，否则返回 (False, None)"""
+        with self._cache_lock:
+            if key not in cache:
+                return False, None
+            cache.move_to_end(key)
+            return True, cache[key]
+
+    def _cache_store(self, cache, key, value, limit):
+        """写入 LRU 缓存，超出 limit 时淘汰最久未用的"""
+        with self._cache_lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > max(1, limit):
+                cache.popitem(last=False)
+
+    def _forget_file(self, path):
+        """文件删除前从目录缓存和格式缓存中移除它的记录"""
+        try:
+            key = self._file_key(path)
+        except OSError:
+            return
+        with self._cache_lock:
+            self._listing_cache.pop(key, None)
+            self._format_cache.pop(key, None)
+
+    def _format_from_name(self, filename):
+        """按扩展名判断压缩格式，无法判断返回None"""
+        name = filename.lower()
+        for ext in sorted(ARCHIVE_EXTENSIONS, key=len, reverse=True):
+            if name.endswith(ext):
+                return ARCHIVE_EXTENSIONS[ext]
+        if self.zip_container_policy != 'skip' and name.endswith(ZIP_CONTAINER_EXTENSIONS):
+            return 'zip'
+        return None
+
+    def _format_from_header(self, head, filename):
+        """按文件头特征判断压缩格式，无法判断返回None"""
+        for offset, magic, fmt in ARCHIVE_SIGNATURES:
+            if head[offset:offset + len(magic)] == magic:
+                return fmt
+        if head[:2] == b'\x1f\x8b':
+            # gzip：解压开头一段，确认里面是tar
+            try:
+                data = zlib.decompressobj(16 + zlib.MAX_WBITS).decompress(head, 512)
+            except zlib.error:
+                data = b''
+            if data[257:262] == b'ustar':
+                return 'tar'
+        if head[:3] == b'BZh' and self._format_from_name(filename) == 'tar':
+            # bzip2 的数据块较大，开头几KB解不出tar头，只能结合扩展名判断
+            return 'tar'
+        if head[:4] in (ZSTD_MAGIC, LZ4_MAGIC) and self._format_from_name(filename) == 'tar':
+            # zstd/lz4 同样按块压缩，开头几KB解不出tar头，结合扩展名判断
+            return 'tar'
+        return None
+
+    def _detect_format(self, file_path):
+        """识别压缩格式：读取一次文件头按特征判断，识别不了再看扩展名；
+        返回 'zip'/'rar'/'7z'/'tar'，不是压缩包返回None。结果按(路径, 大小, 修改时间)缓存"""
+        try:
+            key = self._file_key(file_path)
+        except OSError:
+            return None
+        found, fmt = self._cache_lookup(self._format_cache, key)
+        if found:
+            return fmt
+
         try:
-            # 不使用临时解压，而是直接检查压缩包内结构
-            top_level_items = []
-            is_all_files = True
-            import tempfile
-            temp_dir = tempfile.mkdtemp()
-            
-            if file_path.lower().endswith('.zip'):
-                with zipfile.ZipFile(file_path, 'r') as zf:
-                    for name in zf.namelist():
-                        parts = name.split('/')
-                        if parts and parts[0]:
-                            top_level_items.append(parts[0])
-            elif file_path.lower().endswith('.7z'):
-                with py7zr.SevenZipFile(file_path, mode='r') as zf:
-                    zf.extractall(temp_dir)
-            elif file_path.lower().endswith(('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2')):
+            with open(file_path, 'rb') as f:
+                head = f.read(HEADER_PEEK_SIZE)
+        except OSError:
+            head = b''
+        fmt = self._format_from_header(head, file_path)
+        if self._format_from_name(file_path) is None:
+            # 只有文件头像压缩包（.xlsb/.vsdx/.npz/.unitypackage 等）：展开后会删除原文件，必须由策略明确允许
+            if fmt is not None and not self._magic_only_allowed(fmt, file_path):
+                fmt = None
+        elif fmt is None:
+            fmt = self._format_from_name(file_path)
+        self._cache_store(self._format_cache, key, fmt, self.format_cache_size)
+        return fmt
+
+    def _magic_only_allowed(self, fmt, file_path):
+        """扩展名不是压缩包的文件是否按文件头识别出的格式展开"""
+        if self.zip_container_policy == 'extract_all':
+            return True
+        return self.zip_container_policy == 'extract' and fmt == 'zip' and _is_zip_container(file_path)
+
+    def _list_archive(self, file_path):
+        """只读取压缩包目录（zip中央目录、tar头部、7z/rar文件列表），不解压文件内容；
+        结果按(路径, 大小, 修改时间)缓存，文件变化后自动失效"""
+        key = self._file_key(file_path)
+        found, listing = self._cache_lookup(self._listing_cache, key)
+        if found:
+            return listing
+
+        fmt = self._detect_format(file_path)
+        if fmt == 'zip':
+            with zipfile.ZipFile(file_path, 'r') as zf:
+                infos = zf.infolist()
+            listing = ArchiveListing([(i.filename, i.is_dir(), i.file_size) for i in infos], infos,
+                                     [i.CRC for i in infos])
+        elif fmt == 'rar' and _has_rar():
+            with rarfile.RarFile(file_path, 'r') as rf:
+                infos = rf.infolist()
+            listing = ArchiveListing([(i.filename, i.is_dir(), i.file_size) for i in infos],
+                                     crcs=[i.CRC for i in infos])
+        elif fmt == '7z':
+            with py7zr.SevenZipFile(file_path, mode='r') as zf:
+                infos = zf.list()
+            listing = ArchiveListing([(i.filename, i.is_directory, i.uncompressed) for i in infos],
+                                     crcs=[i.crc32 for i in infos])
+        elif fmt == 'tar':
+            stream = _tar_decompressor(file_path)
+            if stream is None:
                 with tarfile.open(file_path, 'r:*') as tf:
-                    tf.extractall(temp_dir)
+                    infos = tf.getmembers()
             else:
-                raise Exception(f"不支持的压缩格式: {file_path}")
-            
-            # 检查临时目录中的内容
-            contents = os.listdir(temp_dir)
-            if len(contents) == 1:
-                first_item = os.path.join(temp_dir, contents[0])
-                if os.path.isdir(first_item) and os.path.basename(first_item) == base_name:
-                    # 情况1: 根目录存在同名文件夹，直接使用base_name作为目标目录
-                    target_dir = os.path.join(self._sanitize_path(extract_to), base_name)
-                else:
-                    # 情况2: 根目录是松散文件或不同名文件夹，创建base_name作为父目录
-                    target_dir = os.path.join(self._sanitize_path(extract_to), base_name)
+                with stream, tarfile.open(fileobj=stream, mode='r|') as tf:
+                    infos = tf.getmembers()
+            listing = ArchiveListing([(i.name, i.isdir(), i.size) for i in infos], infos)
+        else:
+            raise Exception(f"不支持的压缩格式: {file_path}")
+        self._cache_store(self._listing_cache, key, listing, self.listing_cache_size)
+        return listing
+
+    def open_nested(self, chain):
+        """按嵌套路径打开压缩包深处的一个文件，如 "a.zip!/b.7z!/c.tar.gz!/etc/x.conf"，返回只读的二进制流（用完需关闭）。
+        每一层只解压通向目标的那个成员：存储方式的内层ZIP直接引用外层文件中的位置，其余内层压缩包取出后
+        按 spill_threshold 留在内存或溢出到临时文件，并按 LRU 缓存 read_cache_size 个，再次访问时不必重新解压"""
+        parts = chain.split('!/')
+        if len(parts) < 2 or not all(parts):
+            raise Exception(f"嵌套路径需要用 !/ 分隔压缩包和成员: {chain}")
+        if not os.path.isfile(parts[0]):
+            raise Exception(f"找不到压缩包: {parts[0]}")
+        key = self._file_key(parts[0])
+        source = ('path', key[0], parts[0])  # 来源: (类型, 数据, 名称)，名称用于按扩展名判断格式
+        for name in parts[1:-1]:
+            key += (self._member_key(name),)
+            source = self._inner_source(key, source, name)
+        return self._open_member(source, parts[-1])
+
+    def read_nested(self, chain):
+        """读取嵌套路径指向的文件的全部内容"""
+        with self.open_nested(chain) as stream:
+            return stream.read()
+
+    def clear_read_cache(self):
+        """清空 open_nested 的内层压缩包缓存并删除临时文件"""
+        with self._read_lock:
+            sources = list(self._read_cache.values())
+            self._read_cache.clear()
+        for source in sources:
+            self._release_source(source)
+
+    def _inner_source(self, key, parent, name):
+        """取出下一层压缩包作为来源，命中缓存时直接返回；超出 read_cache_size 时淘汰最久未用的"""
+        with self._read_lock:
+            source = self._read_cache.get(key)
+        if source is None:
+            source = self._spill_member(parent, name)
+        evicted = []
+        with self._read_lock:
+            if key not in self._read_cache:
+                self._read_cache[key] = source
+            elif self._read_cache[key] is not source:
+                # 其他线程已经取出了同一个内层压缩包
+                evicted.append(source)
+                source = self._read_cache[key]
+            self._read_cache.move_to_end(key)
+            while len(self._read_cache) > max(1, self.read_cache_size):
+                evicted.append(self._read_cache.popitem(last=False)[1])
+        for old in evicted:
+            self._release_source(old)
+        return source
+
+    def _release_source(self, source):
+        if source[0] == 'temp':
+            self._safe_remove(source[1])
+
+    def _spill_member(self, parent, name):
+        """把内层压缩包成员取出作为下一层的来源：存储方式的ZIP成员只记录位置，不复制；7z 成员已解压到临时文件，直接接管；
+        其余小于 spill_threshold 时留在内存，否则溢出到临时文件。rarfile 需要磁盘文件，RAR 总是溢出到临时文件"""
+        to_disk = self._format_from_name(name) == 'rar'
+        with self._open_member(parent, name) as member:
+            if member.window is not None and not to_disk:
+                return ('window', member.window, name)
+            if member.temp is not None:
+                return ('temp', member.keep_temp(), name)
+            data = io.BytesIO()
+            target, temp = data, None
+            try:
+                while True:
+                    chunk = member.read(self.copy_chunk_size)
+                    if not chunk:
+                        break
+                    self._check_stop_and_pause()
+                    if temp is None and (to_disk or data.tell() + len(chunk) > self.spill_threshold):
+                        fd, temp = tempfile.mkstemp(suffix=os.path.splitext(name)[1])
+                        target = os.fdopen(fd, 'wb')
+                        target.write(data.getvalue())
+                    target.write(chunk)
+            except BaseException:
+                if temp is not None:
+                    target.close()
+                    self._safe_remove(temp)
+                raise
+        if temp is None and not to_disk:
+            return ('bytes', data.getvalue(), name)
+        if temp is None:
+            fd, temp = tempfile.mkstemp(suffix=os.path.splitext(name)[1])
+            target = os.fdopen(fd, 'wb')
+        target.close()
+        return ('temp', temp, name)
+
+    def _open_source(self, source):
+        """打开来源：磁盘文件返回路径，内存数据和外层文件上的窗口返回文件对象"""
+        kind, data, _ = source
+        if kind == 'bytes':
+            return io.BufferedReader(io.BytesIO(data))
+        if kind == 'window':
+            return _FileWindow(*data)
+        return data
+
+    def _source_format(self, source):
+        """按文件头、其次按扩展名判断来源的格式；明确按路径访问时 .docx/.jar 等ZIP容器也按ZIP打开"""
+        kind, data, name = source
+        if kind == 'bytes':
+            head = data[:HEADER_PEEK_SIZE]
+        else:
+            with (_FileWindow(*data) if kind == 'window' else open(data, 'rb')) as f:
+                head = f.read(HEADER_PEEK_SIZE)
+        return self._format_from_header(head, name) or self._format_from_name(name) or \
+            ('zip' if name.lower().endswith(ZIP_CONTAINER_EXTENSIONS) else None)
+
+    def _find_member(self, items, get_name, name):
+        """在成员列表中按名称查找（忽略开头的 / 和 ./，兼容GBK等编码的文件名）"""
+        key = self._member_key(name)
+        for item in items:
+            raw = get_name(item)
+            if self._member_key(raw) == key or self._member_key(self._decode_filename(raw)) == key:
+                return item
+        raise Exception(f"压缩包中没有该成员: {name}")
+
+    def _member_key(self, name):
+        return '/'.join(part for part in name.replace('\\', '/').split('/') if part not in ('', '.'))
+
+    def _open_member(self, source, name):
+        """在来源压缩包中打开一个成员，只解压这一个成员（tar 顺序读到该成员为止），返回 _MemberStream"""
+        fmt = self._source_format(source)
+        if fmt is None:
+            raise Exception(f"不是支持的压缩包: {source[2]}")
+        opened = self._open_source(source)
+        resources = [] if isinstance(opened, str) else [opened.close]
+        try:
+            if fmt == 'zip':
+                zf = zipfile.ZipFile(opened, 'r')
+                resources.append(zf.close)
+                info = self._find_member(zf.infolist(), lambda i: i.filename, name)
+                stream = self._open_zip_member(zf, info)
+                window = (stream.path, stream.offset, info.file_size) if isinstance(stream, _FileWindow) else None
+                return _MemberStream(stream, resources, info.file_size, window=window)
+            if fmt == '7z':
+                _require_module('py7zr', '7z', 'py7zr')
+                with py7zr.SevenZipFile(opened, mode='r') as zf:
+                    info = self._find_member(zf.list(), lambda i: i.filename, name)
+                    fd, temp = tempfile.mkstemp()
+                    os.close(fd)
+                    try:
+                        zf.extract(targets=[info.filename],
+                                   factory=_SevenZipMemberFactory(temp, self._check_stop_and_pause))
+                    except BaseException:
+                        self._safe_remove(temp)
+                        raise
+                return _MemberStream(open(temp, 'rb'), resources, info.uncompressed, temp=temp)
+            if fmt == 'rar':
+                if not _has_rar():
+                    raise Exception("读取RAR需要安装 rarfile：pip install rarfile")
+                rf = rarfile.RarFile(opened, 'r')
+                resources.append(rf.close)
+                info = self._find_member(rf.infolist(), lambda i: i.filename, name)
+                return _MemberStream(rf.open(info), resources, info.file_size)
+            stream = _tar_decompressor(opened)
+            if stream is None:
+                tf = tarfile.open(opened, 'r|*') if isinstance(opened, str) else tarfile.open(fileobj=opened, mode='r|*')
             else:
-                # 多个文件或文件夹，创建base_name作为父目录
-                target_dir = os.path.join(self._sanitize_path(extract_to), base_name)
-        except Exception as e:
-            self._show_progress(f"检查压缩包结构时出错: {e}")
-            target_dir = os.path.join(self._sanitize_path(extract_to), base_name)
-        finally:
-            # 清理临时目录
-            if 'temp_dir' in locals() and os.path.exists(temp_dir):
-                shutil.rmtree(temp_dir, ignore_errors=True)
-                
-        return target_dir
+                resources.append(stream.close)
+                tf = tarfile.open(fileobj=stream, mode='r|')
+            resources.append(tf.close)
+            key = self._member_key(name)
+            for member in tf:
+                self._check_stop_and_pause()
+                if self._member_key(member.name) == key or self._member_key(self._decode_filename(member.name)) == key:
+                    if not member.isfile():
+                        raise Exception(f"不是普通文件: {name}")
+                    return _MemberStream(tf.extractfile(member), resources, member.size)
+            raise Exception(f"压缩包中没有该成员: {name}")
+        except BaseException:
+            for release in reversed(resources):
+                release()
+            raise
+
+    def _determine_target_directory(self, file_path, extract_to, base_name):
+        """确定解压目标目录：根目录是同名文件夹、松散文件还是多个条目，都解压到 extract_to/base_name，
+        同名的单层文件夹随后由 optimize_extracted_structure 展平，因此不需要读取压缩包目录
+        （tar 读取目录需要完整解压一遍数据流）"""
+        return os.path.join(self._sanitize_path(extract_to), base_name)
 
     def optimize_extracted_structure(self, target_dir):
-        """优化解压后的文件夹结构，减少冗余层级"""
+        """优化解压后的文件夹结构，减少冗余层级；返回移动记录[(原路径, 新路径)]"""
+        moves = []
         if not self.flatten_single_folder:
-            return
+            return moves
             
         # 获取目标目录下的所有内容
         try:
             contents = os.listdir(target_dir)
         except Exception:
-            return
+            return moves
             
         # 如果目录下只有一个子目录，且子目录名与目标目录名相似，则展平
         if len(contents) == 1:
@@ -221,9 +2390,28 @@ class Extractor:
                                 dst = os.path.join(target_dir, f"{base}_{count}{ext}")
                                 count += 1
                         shutil.move(src, dst)
+                        moves.append((src, dst))
                     
                     # 删除空的子目录
                     os.rmdir(first_item)
+        return moves
+
+    def _remap_paths(self, paths, moves):
+        """按 optimize_extracted_structure 的移动记录更新路径"""
+        if not moves:
+            return paths
+        remapped = []
+        for path in paths:
+            for src, dst in moves:
+                if path == src or path.startswith(src + os.sep):
+                    path = dst + path[len(src):]
+                    break
+            remapped.append(path)
+        return remapped
+
+    def _archives_in(self, paths):
+        """从写出的文件中挑出压缩包"""
+        return [path for path in paths if self._detect_format(path) is not None]
 
     def _are_names_similar(self, name1, name2):
         """判断两个名称是否相似（忽略大小写、扩展名和常见后缀）"""
@@ -244,122 +2432,560 @@ class Extractor:
         """清理文件名，移除非法字符"""
         return "".join(c for c in filename if c.isalnum() or c in (' ', '_', '-')).rstrip()
 
-    def extract_nested_archives(self, folder):
-        """处理嵌套压缩包"""
-        while True:
+    def extract_nested_archives(self, folder, archives=None, depth=1):
+        """处理嵌套压缩包：用工作队列调度，解压时写出的内层压缩包直接入队，不再反复遍历输出目录；
+        archives 为已知的待处理压缩包，未提供时才扫描一次 folder，depth 为这些压缩包的嵌套深度。
+        返回解压失败的压缩包集合"""
+        if archives is None:
             archives = self._find_archives(folder)
-            if not archives:
-                break
-                
-            # 按路径长度排序，优先处理内层压缩包
-            archives.sort(key=lambda x: len(x.split(os.sep)))
-            
-            for archive in archives:
+        if self.path_filter is not None and self._origin_of(os.path.join(os.path.abspath(folder), ''),
+                                                            self._logical_dirs) is None:
+            # 直接处理文件夹时，逻辑路径从该文件夹开始
+            self._logical_dirs[os.path.abspath(folder)] = ('', False)
+        # 按路径长度排序，优先处理外层压缩包；队列元素为 (压缩包, 嵌套深度)
+        pending = deque((archive, depth) for archive in sorted(archives, key=lambda x: len(x.split(os.sep))))
+        failed = set()  # 解压失败的压缩包留在原处，不再重试
+        duplicates = []  # (重复的压缩包, 其子文件夹, 第一次解压的压缩包, 第一次解压的子文件夹)
+        elapsed = {}     # 压缩包 -> (子文件夹, 解压耗时)，用于估算去重节省的时间
+
+        if self.parallel_workers > 1:
+            self._extract_nested_parallel(pending, failed, duplicates, elapsed)
+        else:
+            while pending:
+                archive, archive_depth = pending.popleft()
+                if archive in failed:
+                    continue
                 self._check_stop_and_pause()
+                inner = self._resumed_inner(archive)
+                if inner is not None:
+                    pending.extend((path, archive_depth + 1) for path in inner)
+                    continue
+                if self._prune_nested(archive):
+                    self._drop_pruned(archive)
+                    continue
                 
-                # 获取父目录
-                parent_dir = os.path.dirname(archive)
-                
-                # 从文件名生成子文件夹名
-                sub_folder_name = self._sanitize_filename(os.path.splitext(os.path.basename(archive))[0])
-                sub_folder = os.path.join(parent_dir, sub_folder_name)
-                
-                # 确保子文件夹名唯一
-                orig_sub_folder = sub_folder
-                count = 1
-                while os.path.exists(sub_folder):
-                    sub_folder = f"{orig_sub_folder}_{count}"
-                    count += 1
-                    
-                os.makedirs(sub_folder, exist_ok=True)
+                sub_folder = self._allocate_sub_folder(archive)
+                if self._defer_duplicate(archive, sub_folder, duplicates):
+                    continue
                 self._show_progress(f"正在解压嵌套文件: {os.path.basename(archive)}")
                 
                 try:
-                    self._extract_single_archive(archive, sub_folder)
-                    
-                    # 优化解压后的结构
-                    self.optimize_extracted_structure(sub_folder)
-                    
-                    # 处理子文件夹中的嵌套压缩包
-                    if not self._stop.is_set():
-                        self.extract_nested_archives(sub_folder)
-                        
-                    # 如果不需要保留原始压缩包，则删除
-                    if not self.keep_original_archives and not self._stop.is_set():
-                        self._safe_remove(archive)
+                    started = time.monotonic()
+                    inner = self._extract_nested_step(archive, sub_folder, archive_depth)
+                    elapsed[archive] = (sub_folder, time.monotonic() - started)
+                    pending.extend((path, archive_depth + 1) for path in inner)
                 except Exception as e:
+                    if self._stop.is_set():
+                        raise
+                    failed.add(archive)
                     self._show_progress(f"嵌套文件解压失败: {e}")
                     continue
-                    
+
+        if duplicates and not self._stop.is_set():
+            self._fill_duplicates(duplicates, failed, elapsed)
         self._show_progress("")
+        return failed
+
+    def _extract_nested_step(self, archive, sub_folder, depth=1):
+        """解压一层嵌套压缩包，返回其中新写出的内层压缩包"""
+        written = self._extract_single_archive(archive, sub_folder, depth)
+        
+        # 优化解压后的结构
+        moves = self.optimize_extracted_structure(sub_folder)
+        crcs = self._member_crcs(archive, sub_folder, moves)
+        self._remember_logical(written, moves)
+        written = self._remap_paths(written, moves)
+        inner = self._archives_in(written)
+        self._catalog_files(written, inner, crcs)
+        if self.journal is not None and not self._stop.is_set():
+            self.journal.record_done(archive, inner)
+        
+        # 如果不需要保留原始压缩包，则删除
+        if not self.keep_original_archives and not self._stop.is_set():
+            self._safe_remove(archive)
+        return inner
+
+    def _archive_fingerprint(self, archive):
+        """计算压缩包内容指纹：ZIP只读中央目录（成员名、CRC、大小），其他格式对整个文件做SHA-256"""
+        digest = hashlib.sha256()
+        fmt = self._detect_format(archive)
+        digest.update(f"{fmt}:{os.path.getsize(archive)}".encode())
+        if fmt == 'zip':
+            for info in self._list_archive(archive).infos:
+                digest.update(f"{info.filename}\0{info.CRC}\0{info.file_size}\0{info.compress_size}\0"
+                              f"{info.compress_type}\n".encode('utf-8', 'surrogateescape'))
+        else:
+            with open(archive, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+        return digest.hexdigest()
+
+    def _defer_duplicate(self, archive, sub_folder, duplicates):
+        """去重开启时检查压缩包是否与已解压过的压缩包内容相同；相同则记入 duplicates 留待最后填充，返回True"""
+        if not self.dedup_nested:
+            return False
+        try:
+            fingerprint = self._archive_fingerprint(archive)
+        except Exception:
+            return False
+        first = self._dedup_index.get(fingerprint)
+        if first is None or not os.path.isdir(first[1]):
+            self._dedup_index[fingerprint] = (archive, sub_folder)
+            return False
+        duplicates.append((archive, sub_folder) + first)
+        return True
+
+    def _fill_duplicates(self, duplicates, failed, elapsed):
+        """用第一次解压的结果（含其中已展开的嵌套内容）填充重复压缩包的子文件夹。
+        源目录中还有待填充的重复项时先填充那些，保证复制到的是完整结果"""
+        waiting = list(duplicates)
+        while waiting:
+            pending_folders = [item[1] for item in waiting]
+            ready = [item for item in waiting
+                     if not any(self._is_within(folder, item[3]) for folder in pending_folders)]
+            if not ready:
+                ready = waiting[:1]
+            for item in ready:
+                waiting.remove(item)
+                archive, sub_folder, first_archive, first_folder = item
+                self._check_stop_and_pause()
+                if first_archive in failed:
+                    # 原件解压失败，重复项同样留在原处
+                    failed.add(archive)
+                    shutil.rmtree(sub_folder, ignore_errors=True)
+                    continue
+                self._show_progress(f"复用相同压缩包的解压结果: {os.path.basename(archive)}")
+                started = time.monotonic()
+                cloned = []
+                files, saved = self._clone_tree(first_folder, sub_folder, cloned)
+                cost = time.monotonic() - started
+                if self.catalog is not None:
+                    self._clone_origins(first_folder, sub_folder)
+                    # 复用的文件与原件内容相同，CRC直接取原件的记录
+                    crcs = self.catalog.crcs([os.path.abspath(src) for src, _ in cloned])
+                    self._catalog_files([dst for _, dst in cloned],
+                                        crcs={dst: crcs.get(os.path.abspath(src)) for src, dst in cloned})
+                # 节省的时间 = 原件及其内部嵌套压缩包的解压耗时 - 本次链接耗时
+                spent = sum(seconds for path, (_, seconds) in elapsed.items()
+                            if path == first_archive or self._is_within(path, first_folder))
+                self.dedup_stats['archives'] += 1
+                self.dedup_stats['files'] += files
+                self.dedup_stats['bytes_saved'] += saved
+                self.dedup_stats['seconds_saved'] += max(0.0, spent - cost)
+                if self.journal is not None:
+                    self.journal.record_done(archive, [])
+                if not self.keep_original_archives:
+                    self._safe_remove(archive)
+        stats = self.dedup_stats
+        self._show_progress(f"重复压缩包去重: 共复用 {stats['archives']} 个，节省 "
+                            f"{stats['bytes_saved'] / 1024 / 1024:.1f} MB、约 {stats['seconds_saved']:.1f} 秒")
+
+    def _clone_origins(self, source, target):
+        """复用解压结果时，为复制出的各层内层解压目录登记对应的嵌套链"""
+        source, target = os.path.abspath(source), os.path.abspath(target)
+        source_chain, _, _, source_depth = self._origins[source]
+        target_chain, _, target_root, target_depth = self._origins[target]
+        for folder, (chain, archive, _, depth) in list(self._origins.items()):
+            if self._is_within(folder, source):
+                self._origins[target + folder[len(source):]] = (
+                    target_chain + chain[len(source_chain):], target + archive[len(source):],
+                    target_root, depth - source_depth + target_depth)
+
+    def _is_within(self, path, folder):
+        """判断 path 是否位于 folder 之内"""
+        return os.path.abspath(path).startswith(os.path.abspath(folder) + os.sep)
+
+    def _clone_tree(self, source, target, cloned=None):
+        """把 source 目录的内容复制到 target：优先reflink，其次硬链接，都不支持时普通复制；
+        复制的 (源文件, 目标文件) 追加到 cloned，返回 (文件数, 未重复写入磁盘的字节数)"""
+        files = saved = 0
+        for dirpath, dirnames, filenames in os.walk(source):
+            rel = os.path.relpath(dirpath, source)
+            dest_dir = os.path.normpath(os.path.join(target, rel))
+            os.makedirs(dest_dir, exist_ok=True)
+            for filename in filenames:
+                src = os.path.join(dirpath, filename)
+                dst = os.path.join(dest_dir, filename)
+                if self._clone_file(src, dst):
+                    saved += os.path.getsize(src)
+                if cloned is not None:
+                    cloned.append((src, dst))
+                files += 1
+        return files, saved
+
+    def _clone_file(self, src, dst):
+        """复制单个文件，reflink或硬链接成功时返回True（未占用新的磁盘空间）"""
+        if _reflink(src, dst):
+            return True
+        try:
+            os.link(src, dst)
+            return True
+        except OSError:
+            shutil.copy2(src, dst)
+            return False
+
+    def _member_done(self, path, size):
+        """续传时判断成员上次是否已完整写出"""
+        return self.journal is not None and self.journal.member_complete(path, size)
+
+    def _member_written(self, path, size):
+        if self.journal is not None:
+            self.journal.record_member(path, size)
+
+    def _resumed_inner(self, archive):
+        """续传时，上次已解压完成的嵌套压缩包直接返回其中的内层压缩包，否则返回None"""
+        if self.journal is None:
+            return None
+        inner = self.journal.inner_of(archive)
+        if inner is not None and not self.keep_original_archives:
+            # 上次完成后还没来得及删除
+            self._safe_remove(archive)
+        return inner
+
+    def _cataloging(self):
+        return self.catalog is not None or self._catalog_rows is not None
+
+    def _register_origin(self, archive, folder):
+        """记录解压目录对应的压缩包及其嵌套链，目录中的文件据此找到来源"""
+        if not self._cataloging():
+            return
+        archive = os.path.abspath(archive)
+        parent = self._origin_of(archive)
+        if parent is None:
+            origin = (archive, archive, archive, 0)
+        else:
+            (chain, _, root, depth), rel = parent
+            origin = (f"{chain}!/{rel}", archive, root, depth + 1)
+        self._origins[os.path.abspath(folder)] = origin
+
+    def _origin_of(self, path, origins=None):
+        """找到包含 path 的最内层解压目录，返回 (来源信息, 相对路径)，不在任何解压目录中时返回None；
+        origins 默认为 _origins"""
+        origins = self._origins if origins is None else origins
+        folder = os.path.dirname(path)
+        while True:
+            origin = origins.get(folder)
+            if origin is not None:
+                return origin, os.path.relpath(path, folder).replace(os.sep, '/')
+            parent = os.path.dirname(folder)
+            if parent == folder:
+                return None
+            folder = parent
+
+    def _logical_of(self, path):
+        """文件的逻辑嵌套路径（压缩包名和成员名用 / 连接）及其所在压缩包是否整包保留；
+        不在任何已登记的解压目录中时逻辑路径为文件名"""
+        path = os.path.abspath(path)
+        known = self._logical_paths.get(path)
+        if known is not None:
+            return known
+        found = self._origin_of(path, self._logical_dirs)
+        if found is None:
+            return os.path.basename(path), False
+        (prefix, whole), rel = found
+        return (f"{prefix}/{rel}" if prefix else rel), whole
+
+    def _register_logical(self, archive, folder):
+        """登记解压目录对应的逻辑路径；压缩包本身被包含模式匹配时，其中的内容整包保留"""
+        if self.path_filter is None:
+            return
+        logical, whole = self._logical_of(archive)
+        self._logical_dirs[os.path.abspath(folder)] = (logical, whole or self.path_filter.includes(logical))
+
+    def _remember_logical(self, paths, moves):
+        """展平会移动内层压缩包：按移动前的位置算出逻辑路径，登记到移动后的位置"""
+        if self.path_filter is None or not moves:
+            return
+        for old, new in zip(paths, self._remap_paths(paths, moves)):
+            if new != old and self._detect_format(new) is not None:
+                self._logical_paths[os.path.abspath(new)] = self._logical_of(old)
+
+    def _wanted(self, path, is_dir=False):
+        """按 path_filter 判断解压目标路径是否需要写出：匹配的文件和目录、可能包含匹配的内层压缩包"""
+        if self.path_filter is None:
+            return True
+        logical, whole = self._logical_of(path)
+        if self.path_filter.excludes(logical):
+            return False
+        if whole or self.path_filter.includes(logical):
+            return True
+        return not is_dir and self._is_supported_archive(path) and self.path_filter.may_contain(logical)
+
+    def _prune_nested(self, archive):
+        """过滤开启时读取内层压缩包目录：其中既没有要保留的文件，也没有可能包含匹配的更深一层压缩包时返回True，
+        整个压缩包不必解压。tar 读取目录需要完整解压数据流，不做判断"""
+        if self.path_filter is None:
+            return False
+        logical, whole = self._logical_of(archive)
+        if whole or self.path_filter.includes(logical):
+            return False
+        fmt = self._detect_format(archive)
+        if fmt not in FORMAT_HANDLERS or fmt == 'tar' or not FORMAT_HANDLERS[fmt].listable:
+            return False
+        try:
+            entries = self._list_archive(archive).entries
+        except Exception:
+            return False
+        for name, is_dir, _ in entries:
+            member = f"{logical}/{self._decode_filename(name).strip('/')}"
+            if is_dir or self.path_filter.excludes(member):
+                continue
+            if self.path_filter.includes(member) or \
+                    (self._is_supported_archive(member) and self.path_filter.may_contain(member)):
+                return False
+        return True
+
+    def _drop_pruned(self, archive):
+        """删除不含匹配内容的内层压缩包，续传时视为已完成"""
+        self._show_progress(f"跳过不含匹配文件的嵌套压缩包: {os.path.basename(archive)}")
+        if self.journal is not None:
+            self.journal.record_done(archive, [])
+        self._safe_remove(archive)
+
+    def _member_crcs(self, archive, target_dir, moves=None):
+        """从压缩包目录取出各成员的CRC（ZIP/7z/RAR 的目录中有），按解压后的最终路径返回"""
+        fmt = self._detect_format(archive)
+        if not self._cataloging() or fmt not in ('zip', '7z', 'rar'):
+            return {}
+        listing = self._list_archive(archive)
+        paths, values = [], []
+        for (raw, is_dir, _), crc in zip(listing.entries, listing.crcs):
+            if is_dir or crc is None:
+                continue
+            if fmt == 'zip':
+                name = self._safe_member_name(raw)
+            else:
+                # 7z/RAR 按原始成员名写出，不做编码修正
+                name = os.path.normpath(raw)
+                if os.path.isabs(name) or '..' in pathlib.PurePath(name).parts:
+                    name = None
+            if name is not None:
+                paths.append(os.path.join(target_dir, name))
+                values.append(crc)
+        return dict(zip(self._remap_paths(paths, moves), values))
+
+    def _catalog_files(self, paths, archives=(), crcs=None):
+        """把解压出的文件写入目录；将被继续解压并删除的内层压缩包不记录"""
+        if not self._cataloging():
+            return
+        skip = set() if self.keep_original_archives else set(archives)
+        now = time.time()
+        rows = []
+        for path in paths:
+            if path in skip:
+                continue
+            crc = (crcs or {}).get(path)
+            path = os.path.abspath(path)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            origin = self._origin_of(path)
+            if origin is None:
+                chain, source, root, depth = path, None, None, 0
+            else:
+                (archive_chain, source, root, depth), rel = origin
+                chain = f"{archive_chain}!/{rel}"
+            rows.append((path, os.path.basename(path), chain, depth, st.st_size, crc, source, root,
+                         st.st_mtime, now))
+        if self.catalog is not None:
+            self.catalog.add(rows)
+        else:
+            self._catalog_rows.extend(rows)
+
+    def _allocate_sub_folder(self, archive):
+        """根据压缩包文件名在其所在目录下创建唯一的子文件夹；续传时沿用上次分配的子文件夹"""
+        previous = self.journal.folder_of(archive) if self.journal is not None else None
+        if previous is not None:
+            os.makedirs(previous, exist_ok=True)
+            self._register_origin(archive, previous)
+            self._register_logical(archive, previous)
+            return previous
+        # 从文件名生成子文件夹名
+        sub_folder_name = self._sanitize_filename(os.path.splitext(os.path.basename(archive))[0])
+        sub_folder = os.path.join(os.path.dirname(archive), sub_folder_name)
+        
+        # 确保子文件夹名唯一（用 makedirs 原子地占用目录名，多线程同时分配也不会冲突）
+        orig_sub_folder = sub_folder
+        count = 1
+        while True:
+            try:
+                os.makedirs(sub_folder)
+                self._register_origin(archive, sub_folder)
+                self._register_logical(archive, sub_folder)
+                if self.journal is not None:
+                    self.journal.record_folder(archive, sub_folder)
+                return sub_folder
+            except FileExistsError:
+                sub_folder = f"{orig_sub_folder}_{count}"
+                count += 1
+
+    def _worker_options(self):
+        """传递给子进程的解压选项"""
+        return {
+            'keep_original_archives': self.keep_original_archives,
+            'flatten_single_folder': self.flatten_single_folder,
+            'in_memory_nested': self.in_memory_nested,
+            'spill_threshold': self.spill_threshold,
+            'zip_container_policy': self.zip_container_policy,
+            'zip_threads': self.zip_threads,
+            'decompress_threads': self.decompress_threads,
+            'sevenzip_workers': self.sevenzip_workers,
+            'backend': self.backend,
+            '_backend_speed': dict(self._backend_speed),
+            'path_filter': self.path_filter,
+            'copy_chunk_size': self.copy_chunk_size,
+            'listing_cache_size': self.listing_cache_size,
+            'format_cache_size': self.format_cache_size,
+        }
+
+    @contextlib.contextmanager
+    def _process_control(self):
+        """供进程池使用的共享状态：返回 (manager, 终止事件, 暂停事件, 进度队列)。
+        后台线程把本进程的暂停/终止状态同步给子进程，并转发子进程的进度事件"""
+        with multiprocessing.Manager() as manager:
+            # 进程间共享的暂停/终止状态和进度队列
+            stop_event = manager.Event()
+            pause_event = manager.Event()
+            pause_event.set()
+            progress_queue = manager.Queue()
+            finished = threading.Event()
+
+            def relay():
+                """把本进程的暂停/终止状态同步给子进程，并转发子进程的进度信息"""
+                paused = False
+                while True:
+                    if self._stop.is_set():
+                        if not stop_event.is_set():
+                            stop_event.set()
+                            pause_event.set()
+                    elif paused != (not self._pause.is_set()):
+                        paused = not paused
+                        if paused:
+                            pause_event.clear()
+                        else:
+                            pause_event.set()
+                    try:
+                        self._emit(progress_queue.get(timeout=0.1))
+                    except queue.Empty:
+                        if finished.is_set():
+                            break
+
+            relay_thread = threading.Thread(target=relay, daemon=True)
+            relay_thread.start()
+            try:
+                yield manager, stop_event, pause_event, progress_queue
+            finally:
+                finished.set()
+                relay_thread.join()
+
+    def _extract_nested_parallel(self, pending, failed, duplicates, elapsed):
+        """用进程池并行解压队列中的嵌套压缩包，子进程返回新写出的内层压缩包后继续入队"""
+        with self._process_control() as (_, stop_event, pause_event, progress_queue):
+            with concurrent_futures.ProcessPoolExecutor(max_workers=self.parallel_workers) as pool:
+                running = {}
+                while pending or running:
+                    # 保持每个进程都有任务；子文件夹在主进程中依次创建，保证各子进程的目标目录互不冲突
+                    while pending and len(running) < self.parallel_workers * 2:
+                        archive, depth = pending.popleft()
+                        if archive in failed:
+                            continue
+                        self._check_stop_and_pause()
+                        inner = self._resumed_inner(archive)
+                        if inner is not None:
+                            pending.extend((path, depth + 1) for path in inner)
+                            continue
+                        if self._prune_nested(archive):
+                            self._drop_pruned(archive)
+                            continue
+                        sub_folder = self._allocate_sub_folder(archive)
+                        if self._defer_duplicate(archive, sub_folder, duplicates):
+                            continue
+                        options = self._worker_options()
+                        if self.journal is not None:
+                            options['journal'] = self.journal.for_folder(sub_folder)
+                        if self._cataloging():
+                            # 子进程只需知道自己目标目录的来源，目录行由主进程统一写入
+                            options['_catalog_rows'] = []
+                            options['_origins'] = {os.path.abspath(sub_folder):
+                                                   self._origins[os.path.abspath(sub_folder)]}
+                        if self.path_filter is not None:
+                            options['_logical_dirs'] = {os.path.abspath(sub_folder):
+                                                        self._logical_dirs[os.path.abspath(sub_folder)]}
+                        future = pool.submit(_nested_archive_worker, archive, sub_folder, depth,
+                                             options, stop_event, pause_event, progress_queue)
+                        running[future] = (archive, depth, sub_folder, time.monotonic())
+                    if not running:
+                        break
+                    done, _ = concurrent_futures.wait(running, return_when=concurrent_futures.FIRST_COMPLETED)
+                    for future in done:
+                        archive, depth, sub_folder, started = running.pop(future)
+                        try:
+                            inner, rows, logical = future.result()
+                            if rows and self.catalog is not None:
+                                self.catalog.add(rows)
+                            self._logical_paths.update(logical)
+                            pending.extend((path, depth + 1) for path in inner)
+                            elapsed[archive] = (sub_folder, time.monotonic() - started)
+                        except Exception as e:
+                            failed.add(archive)
+                            self._show_progress(f"嵌套文件解压失败: {e}")
+        self._check_stop_and_pause()
 
     def _find_archives(self, folder):
         """查找文件夹中的所有压缩包"""
         archives = []
         for dirpath, _, filenames in os.walk(folder):
             for filename in filenames:
-                if self._is_supported_archive(filename):
-                    archives.append(os.path.join(dirpath, filename))
+                path = os.path.join(dirpath, filename)
+                if self._detect_format(path) is not None:
+                    archives.append(path)
         return archives
 
     def _get_base_folder(self, path):
         """从压缩包路径获取基本文件夹名"""
         filename = os.path.basename(path)
-        for ext in ['.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.zip', '.rar', '.7z', '.tar']:
+        for ext in ['.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.zst', '.tzst', '.tar.lz4',
+                    '.zip', '.rar', '.7z', '.tar']:
             if filename.lower().endswith(ext):
                 return os.path.join(os.path.dirname(path), filename[:-len(ext)])
         return os.path.join(os.path.dirname(path), filename)
 
-    def _extract_single_archive(self, archive, target_dir):
-        """解压单个压缩包"""
-        if archive.lower().endswith('.zip'):
-            with zipfile.ZipFile(archive, 'r') as zf:
-                try:
-                    # 修正文件名编码
-                    for member in zf.infolist():
-                        member.filename = self._decode_filename(member.filename)
-                        if not os.path.isabs(member.filename) and '..' not in pathlib.PurePath(member.filename).parts:
-                            zf.extract(member, target_dir)
-                except RuntimeError as e:
-                    if 'password required' in str(e).lower():
-                        self._show_progress("检测到加密压缩包，暂不支持密码解压，已跳过。")
-        elif has_rar and archive.lower().endswith('.rar'):
-            with rarfile.RarFile(archive, 'r') as rf:
-                try:
-                    rf.extractall(target_dir)
-                except rarfile.PasswordRequired:
-                    self._show_progress("检测到加密RAR包，暂不支持密码解压，已跳过。")
-        elif archive.lower().endswith('.7z'):
-            with py7zr.SevenZipFile(archive, mode='r') as zf:
-                try:
-                    zf.extractall(target_dir)
-                except py7zr.exceptions.PasswordRequired:
-                    self._show_progress("检测到加密7z包，暂不支持密码解压，已跳过。")
-        elif archive.lower().endswith(('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2')):
-            with tarfile.open(archive, 'r:*') as tf:
-                try:
-                    # 处理文件名编码问题
-                    for member in tf.getmembers():
-                        member.name = self._decode_filename(member.name)
-                        if not os.path.isabs(member.name) and '..' not in pathlib.PurePath(member.name).parts:
-                            tf.extract(member, target_dir)
-                except Exception as e:
-                    self._show_progress(f"tar解压异常: {e}")
+    def _extract_single_archive(self, archive, target_dir, depth=1):
+        """解压单个压缩包，返回写出的文件路径"""
+        written = []
+        fmt = self._detect_format(archive)
+        if fmt not in FORMAT_HANDLERS:
+            return written
+        tracker = self._format_tracker(fmt, 'nested' if depth else 'extract', archive, depth, target_dir)
+        try:
+            self._extract_with_backends(fmt, archive, target_dir, written, tracker)
+        except Exception as e:
+            if fmt != 'tar' or self._stop.is_set():
+                raise
+            self._show_progress(f"tar解压异常: {e}")
+        return written
 
-    def _cleanup_extracted_archives(self, target_dir, original_file):
-        """清理解压后的压缩包文件"""
+    def _cleanup_extracted_archives(self, target_dir, original_file, archives=None):
+        """清理解压后的压缩包文件；提供 archives 时只删除这些文件，不遍历目录"""
+        if archives is not None:
+            for file_path in archives:
+                if file_path != original_file:
+                    self._safe_remove(file_path)
+            return
         for root, _, files in os.walk(target_dir):
             for f in files:
                 file_path = os.path.join(root, f)
-                if self._is_supported_archive(f) and file_path != original_file:
+                if self._detect_format(file_path) is not None and file_path != original_file:
                     self._safe_remove(file_path)
 
     def _is_supported_archive(self, filename):
-        """检查是否为支持的压缩格式"""
-        return filename.lower().endswith(('.zip', '.rar', '.7z', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2'))
+        """按文件名检查是否为支持的压缩格式（用于无法预读文件头的成员流）"""
+        return self._format_from_name(filename) is not None
 
     def _safe_remove(self, path):
         """安全删除文件"""
+        self._forget_file(path)
         try:
             os.remove(path)
         except Exception:
@@ -409,115 +3035,504 @@ class Extractor:
 
     def _show_progress(self, msg):
         """显示进度信息"""
+        self._emit(ProgressEvent('message', message=msg))
+
+    def _emit(self, event):
+        """分发进度事件：结构化回调收到事件本身，文本回调收到格式化后的文字"""
+        if self.event_callback:
+            self.event_callback(event)
         if self.progress_callback:
-            self.progress_callback(msg)
+            self.progress_callback(self._event_text(event))
+
+    def _event_text(self, event):
+        """把进度事件格式化为界面显示的文字"""
+        if event.phase == 'message':
+            return event.message
+        action = "正在压缩" if event.phase == 'compress' else "正在解压"
+        text = f"{action}: {os.path.basename(event.archive or '')}"
+        if event.member:
+            text += f" / {os.path.basename(event.member)}"
+        if event.percent is not None:
+            text += f"  {event.percent:.0f}%"
+        if event.files_total:
+            text += f"  {event.files_done}/{event.files_total} 个文件"
+        if event.speed:
+            text += f"  {event.speed / 1024 / 1024:.1f} MB/s"
+        if event.eta is not None:
+            text += f"  剩余 {event.eta:.0f} 秒"
+        return text
+
+    def _tracker(self, phase, archive, bytes_total=None, files_total=None, depth=0):
+        """创建进度统计器"""
+        return ProgressTracker(self._emit, phase, archive, bytes_total, files_total, depth)
+
+    def _listing_tracker(self, phase, archive, listing=None, depth=0, target_dir=None):
+        """按压缩包目录中的解压后大小创建进度统计器，给出 target_dir 时只统计 path_filter 保留的成员；
+        读取目录失败时总量未知"""
+        try:
+            if listing is None:
+                listing = self._list_archive(archive)
+            files = [size for name, is_dir, size in listing.entries if not is_dir and
+                     (target_dir is None or self._wanted(os.path.join(target_dir, os.path.normpath(name))))]
+            return self._tracker(phase, archive, sum(files), len(files), depth)
+        except Exception:
+            return self._tracker(phase, archive, depth=depth)
+
+    def _child_depth(self, tracker):
+        """成员流中内层压缩包的嵌套深度"""
+        return tracker.depth + 1 if tracker is not None else 1
 
     def compress_folder(self, folder_path, archive_path, fmt="zip"):
         """压缩文件夹"""
+        self._compress(folder_path, archive_path, fmt)
+
+    def _compress(self, source_path, archive_path, fmt):
+        """压缩文件或文件夹：按 COMPRESS_WRITERS 找到对应格式的写入方法"""
         self.compressed_files.append(archive_path)
-        self._show_progress(f"正在压缩: {os.path.basename(folder_path)}")
-        try:
-            if fmt == "zip":
-                with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zf:
-                    for root, dirs, files in os.walk(folder_path):
-                        for file in files:
-                            self._check_stop_and_pause()
-                            abs_path = os.path.join(root, file)
-                            rel_path = os.path.relpath(abs_path, folder_path)
-                            zf.write(abs_path, rel_path)
-            elif fmt == "7z":
-                with py7zr.SevenZipFile(archive_path, 'w') as zf:
-                    self._check_stop_and_pause()
-                    zf.writeall(folder_path, arcname="")
-            elif fmt == "tar":
-                with tarfile.open(archive_path, "w:gz") as tf:
-                    self._check_stop_and_pause()
-                    tf.add(folder_path, arcname=os.path.basename(folder_path))
-            elif fmt == "rar" and has_rar:
-                with rarfile.RarFile(archive_path, 'w') as rf:
-                    for root, dirs, files in os.walk(folder_path):
-                        for file in files:
-                            self._check_stop_and_pause()
-                            abs_path = os.path.join(root, file)
-                            rel_path = os.path.relpath(abs_path, folder_path)
-                            rf.write(abs_path, rel_path)
-            else:
+        self._show_progress(f"正在压缩: {os.path.basename(source_path)}")
+        before = dict(self.compress_stats)
+        try:
+            writer = COMPRESS_WRITERS.get(fmt)
+            if writer is None or (fmt == "rar" and not _has_rar()):
                 raise Exception("不支持的压缩格式")
+            if os.path.isdir(source_path):
+                files = self._collect_files(source_path)
+            else:
+                files = [(source_path, os.path.basename(source_path), os.path.getsize(source_path))]
+            tracker = self._tracker('compress', archive_path, sum(size for _, _, size in files), len(files))
+            getattr(self, writer)(source_path, archive_path, files, tracker)
+            self._report_compress_stats(before)
             self._show_progress("压缩完成")
         except Exception as e:
             self._show_progress(f"压缩失败: {str(e)}")
             raise
 
-    def compress_file(self, file_path, archive_path, fmt="zip"):
-        """压缩文件"""
-        self.compressed_files.append(archive_path)
-        self._show_progress(f"正在压缩: {os.path.basename(file_path)}")
+    def _write_zip(self, source_path, archive_path, files, tracker):
+        """写入ZIP：多线程deflate，已压缩的数据直接存储"""
+        with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+            self._zip_write_all(zf, [(abs_path, rel_path) for abs_path, rel_path, _ in files], tracker)
+
+    def _write_7z(self, source_path, archive_path, files, tracker):
+        """写入7z：先写入目录（保留空目录），再逐个分块写入文件"""
+        with self._open_7z_for_write(archive_path, files) as zf:
+            if os.path.isdir(source_path):
+                for root, dirs, _ in os.walk(source_path):
+                    for name in dirs:
+                        path = os.path.join(root, name)
+                        zf.write(path, os.path.relpath(path, source_path))
+            for abs_path, rel_path, _ in files:
+                self._check_stop_and_pause()
+                self._7z_write(zf, abs_path, rel_path, tracker)
+
+    def _write_tar_gz(self, source_path, archive_path, files, tracker):
+        """写入 tar.gz"""
+        with self._open_tar_for_write(archive_path, files) as tf:
+            self._tar_add(tf, source_path, os.path.basename(source_path), tracker)
+
+    def _write_tar_zst(self, source_path, archive_path, files, tracker):
+        """写入 tar.zst"""
+        with self._open_tar_stream_for_write(archive_path, "tar.zst") as tf:
+            self._tar_add(tf, source_path, os.path.basename(source_path), tracker)
+
+    def _write_tar_lz4(self, source_path, archive_path, files, tracker):
+        """写入 tar.lz4"""
+        with self._open_tar_stream_for_write(archive_path, "tar.lz4") as tf:
+            self._tar_add(tf, source_path, os.path.basename(source_path), tracker)
+
+    def _write_rar(self, source_path, archive_path, files, tracker):
+        """写入RAR"""
+        with rarfile.RarFile(archive_path, 'w') as rf:
+            for abs_path, rel_path, size in files:
+                self._check_stop_and_pause()
+                rf.write(abs_path, rel_path)
+                tracker.advance(rel_path, size)
+
+    def _zip_write_all(self, zf, files, tracker=None):
+        """并行压缩ZIP成员：线程池各自deflate一个文件（zlib 压缩时释放GIL），
+        本线程按 files 的顺序追加本地头和数据，中央目录仍由 zf.close() 写出。
+        每个成员的压缩方式与线程数无关，因此输出与线程数无关、逐字节相同"""
+        workers = max(1, self.compress_threads)
+        if workers == 1:
+            # 单线程时边压缩边写入 zf，不经过临时文件
+            for path, arcname in files:
+                self._zip_write_member(zf, self._zip_member_info(path, arcname), path, tracker)
+                if tracker is not None:
+                    tracker.advance(arcname, 0)
+            return
+        window = workers * 2
+        # 排队中的成员压缩结果共享溢出阈值，超过后写入临时文件
+        spool_size = max(self.copy_chunk_size, self.spill_threshold // window)
+        pending = deque()
+        path_of = {}
+        files = iter(files)
+        with concurrent_futures.ThreadPoolExecutor(max_workers=workers) as pool:
+            def fill():
+                while len(pending) < window:
+                    item = next(files, None)
+                    if item is None:
+                        return
+                    path, arcname = item
+                    path_of[arcname] = path
+                    pending.append((arcname, pool.submit(self._deflate_member, path, arcname, spool_size, tracker)))
+            fill()
+            try:
+                while pending:
+                    arcname, future = pending.popleft()
+                    fill()
+                    info, spool = future.result()
+                    if spool is None:
+                        self._zip_write_member(zf, info, path_of[arcname], tracker)
+                    else:
+                        with spool:
+                            self._zip_append(zf, info, spool)
+                    if tracker is not None:
+                        tracker.advance(arcname, 0)
+            finally:
+                for _, future in pending:
+                    future.cancel()
+                for _, future in pending:
+                    if not future.cancelled() and future.exception() is None and future.result()[1] is not None:
+                        future.result()[1].close()
+
+    def _zip_member_info(self, path, arcname):
+        """按与 zf.write 相同的参数生成成员的 ZipInfo，判定为不可压缩时设为 STORED"""
+        info = zipfile.ZipInfo.from_file(path, arcname)
+        if self._should_store(path, info.file_size, 'zip'):
+            info.compress_type = zipfile.ZIP_STORED
+        else:
+            info.compress_type = zipfile.ZIP_DEFLATED
+        return info
+
+    def _zip_write_member(self, zf, info, path, tracker=None):
+        """用 zf.open 写入一个成员，按 info.compress_type 边读边压缩（或直接存储），每块检查暂停/终止"""
+        report = self._byte_reporter(info.filename, tracker)
+        with open(path, 'rb') as source, zf.open(info, 'w') as dest:
+            while True:
+                self._check_stop_and_pause()
+                chunk = source.read(self.copy_chunk_size)
+                if not chunk:
+                    break
+                dest.write(chunk)
+                if report is not None:
+                    report(len(chunk))
+
+    def _deflate_member(self, path, arcname, spool_size, tracker=None):
+        """在工作线程中按与 zf.write 相同的参数deflate一个文件，返回填好CRC和大小的 ZipInfo 和压缩数据；
+        判定为不可压缩时返回 STORED 的 ZipInfo 和 None，由写入线程直接复制"""
+        info = self._zip_member_info(path, arcname)
+        if info.compress_type == zipfile.ZIP_STORED:
+            return info, None
+        compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        report = self._byte_reporter(arcname, tracker)
+        spool = tempfile.SpooledTemporaryFile(max_size=spool_size)
+        crc = size = 0
         try:
-            if fmt == "zip":
-                with zipfile.ZipFile(archive_path, 'w', zipfile.ZIP_DEFLATED) as zf:
+            with open(path, 'rb') as source:
+                while True:
                     self._check_stop_and_pause()
-                    zf.write(file_path, os.path.basename(file_path))
-            elif fmt == "7z":
-                with py7zr.SevenZipFile(archive_path, 'w') as zf:
-                    self._check_stop_and_pause()
-                    zf.write(file_path, arcname=os.path.basename(file_path))
-            elif fmt == "tar":
-                with tarfile.open(archive_path, "w:gz") as tf:
-                    self._check_stop_and_pause()
-                    tf.add(file_path, arcname=os.path.basename(file_path))
-            else:
-                raise Exception("不支持的压缩格式")
-            self._show_progress("压缩完成")
-        except Exception as e:
-            self._show_progress(f"压缩失败: {str(e)}")
+                    chunk = source.read(self.copy_chunk_size)
+                    if not chunk:
+                        break
+                    crc = zlib.crc32(chunk, crc)
+                    size += len(chunk)
+                    spool.write(compressor.compress(chunk))
+                    if report is not None:
+                        report(len(chunk))
+            spool.write(compressor.flush())
+        except BaseException:
+            spool.close()
             raise
+        info.CRC = crc
+        info.file_size = size
+        info.compress_size = spool.tell()
+        spool.seek(0)
+        return info, spool
+
+    def _zip_append(self, zf, info, data):
+        """把工作线程已压缩好的成员追加到 zf，本地头与 zf.open(info, 'w') 写出的相同。
+        zipfile 没有写入预压缩数据的公开接口，这里只依赖一个私有属性 zf.start_dir：
+        close() 从这里写中央目录，之后的 zf.open 也从这里继续写，因此写完成员后要更新它"""
+        if not info.external_attr:
+            info.external_attr = 0o600 << 16
+        # 与 zf.open 相同：压缩后可能比原文件略大
+        zip64 = info.file_size * 1.05 > zipfile.ZIP64_LIMIT
+        info.header_offset = zf.fp.tell()
+        zf.fp.write(info.FileHeader(zip64))
+        while True:
+            self._check_stop_and_pause()
+            chunk = data.read(self.copy_chunk_size)
+            if not chunk:
+                break
+            zf.fp.write(chunk)
+        zf.filelist.append(info)
+        zf.NameToInfo[info.filename] = info
+        zf.start_dir = zf.fp.tell()
+
+    def _should_store(self, path, size, fmt):
+        """判断文件是否已是压缩数据；判定直接存储时累计节省的CPU时间估计"""
+        if not self.adaptive_compression or not self._incompressible(path, size):
+            return False
+        self._count_stored(1, size, fmt)
+        return True
+
+    def _incompressible(self, path, size):
+        """按扩展名和采样块判断文件是否已是压缩数据：小文件不采样（检查比直接压缩还慢），
+        其余用 zlib 最快级别试压缩采样块（在C中执行并释放GIL，也能发现重复的随机块这类长距离重复）"""
+        if not size:
+            return False
+        if os.path.splitext(path)[1].lower() in _STORED_EXTENSIONS:
+            return True
+        if size < _STORE_SAMPLE:
+            return False
+        try:
+            sample = _read_sample(path, size)
+        except OSError:
+            return False
+        return bool(sample) and len(zlib.compress(sample, 1)) >= len(sample) * _STORE_RATIO
+
+    def _count_stored(self, files, size, fmt):
+        """累计直接存储的文件数、字节数和估计节省的CPU时间（每种格式的压缩耗时只测一次）"""
+        cost = self._compress_costs.get(fmt)
+        if cost is None:
+            cost = self._compress_costs[fmt] = _compress_cost(fmt)
+        with self._stats_lock:
+            self.compress_stats['stored_files'] += files
+            self.compress_stats['stored_bytes'] += size
+            self.compress_stats['cpu_seconds_saved'] += cost * size
+
+    def _store_whole_archive(self, files, fmt):
+        """7z/tar.gz 只有一个压缩流，无法逐个文件选择：不可压缩的字节占比达到阈值时整包不压缩。
+        从大文件开始判断，结论确定（已达到阈值或剩余文件全算上也达不到）后不再检查其余文件"""
+        total = sum(size for _, _, size in files)
+        if not self.adaptive_compression or not total:
+            return False
+        needed = total * _STORE_ARCHIVE_RATIO
+        stored = 0
+        remaining = total
+        for path, _, size in sorted(files, key=lambda item: item[2], reverse=True):
+            if stored >= needed or stored + remaining < needed:
+                break
+            remaining -= size
+            if self._incompressible(path, size):
+                stored += size
+        if stored < needed:
+            return False
+        self._count_stored(len(files), total, fmt)
+        return True
+
+    def _open_7z_for_write(self, archive_path, files):
+        """打开要写入的7z包，内容基本都已压缩时使用 copy 过滤器（不压缩）"""
+        if self._store_whole_archive(files, '7z'):
+            return py7zr.SevenZipFile(archive_path, 'w', filters=[{'id': py7zr.FILTER_COPY}])
+        return py7zr.SevenZipFile(archive_path, 'w')
+
+    def _open_tar_for_write(self, archive_path, files):
+        """打开要写入的 tar.gz，内容基本都已压缩时使用 gzip 级别0（只存储）"""
+        if self._store_whole_archive(files, 'tar'):
+            return tarfile.open(archive_path, "w:gz", compresslevel=0)
+        return tarfile.open(archive_path, "w:gz")
+
+    @contextlib.contextmanager
+    def _open_tar_stream_for_write(self, archive_path, fmt):
+        """以流模式写入 tar.zst（zstd 多线程压缩）或 tar.lz4，退出时依次结束tar和压缩帧"""
+        if fmt == "tar.zst":
+            _require_module('zstandard', 'tar.zst', 'zstandard')
+            level = 3 if self.compress_level is None else self.compress_level
+            threads = self.compress_threads if self.compress_threads > 1 else 0
+            with open(archive_path, 'wb') as raw, \
+                    zstandard.ZstdCompressor(level=level, threads=threads).stream_writer(raw, closefd=False) as target:
+                with tarfile.open(archive_path, 'w|', fileobj=target) as tf:
+                    yield tf
+        else:
+            _require_module('lz4.frame', 'tar.lz4', 'lz4')
+            level = 0 if self.compress_level is None else self.compress_level
+            with lz4frame.open(archive_path, 'wb', compression_level=level) as target:
+                with tarfile.open(archive_path, 'w|', fileobj=target) as tf:
+                    yield tf
+
+    def _report_compress_stats(self, before):
+        """报告本次压缩中直接存储的文件数和估计节省的CPU时间"""
+        stored = self.compress_stats['stored_files'] - before['stored_files']
+        if stored:
+            size = self.compress_stats['stored_bytes'] - before['stored_bytes']
+            saved = self.compress_stats['cpu_seconds_saved'] - before['cpu_seconds_saved']
+            self._show_progress(f"{stored} 个已压缩文件（{size / 1024 / 1024:.1f} MB）直接存储，"
+                                f"估计节省CPU时间 {saved:.1f} 秒")
+
+    def _7z_write(self, zf, path, arcname, tracker=None):
+        """通过 writef 分块写入一个文件，写入过程中可暂停/终止"""
+        with open(path, 'rb') as source:
+            reader = _InterruptibleReader(source, self._check_stop_and_pause,
+                                          self._byte_reporter(arcname, tracker), self.copy_chunk_size)
+            zf.writef(reader, arcname)
+            reader.report()
+        # writef 按内存数据记录当前时间，改回源文件的时间和属性
+        try:
+            meta = zf._make_file_info(pathlib.Path(path), arcname)
+            entry = zf.header.files_info.files[-1]
+            for key in ('creationtime', 'lastwritetime', 'lastaccesstime', 'attributes'):
+                entry[key] = meta[key]
+        except (AttributeError, IndexError, KeyError):
+            pass
+        if tracker is not None:
+            tracker.advance(arcname, 0)
+
+    def _tar_add(self, tf, path, arcname, tracker=None):
+        """与 tf.add 相同地递归加入文件或文件夹，普通文件分块写入，写入过程中可暂停/终止"""
+        self._check_stop_and_pause()
+        if tf.name is not None and os.path.abspath(path) == tf.name:
+            return  # 跳过正在写入的压缩包本身
+        info = tf.gettarinfo(path, arcname)
+        if info is None:
+            return  # 套接字等无法归档的文件
+        if info.isreg():
+            with open(path, 'rb') as source:
+                reader = _InterruptibleReader(source, self._check_stop_and_pause,
+                                              self._byte_reporter(arcname, tracker), self.copy_chunk_size)
+                tf.addfile(info, reader)
+                reader.report()
+            if tracker is not None:
+                tracker.advance(arcname, 0)
+        else:
+            tf.addfile(info)
+            if info.isdir():
+                for name in sorted(os.listdir(path)):
+                    self._tar_add(tf, os.path.join(path, name), f"{arcname}/{name}", tracker)
+
+    def _collect_files(self, folder_path):
+        """列出文件夹中要压缩的文件：[(绝对路径, 相对路径, 大小)]"""
+        files = []
+        for root, dirs, names in os.walk(folder_path):
+            for name in names:
+                abs_path = os.path.join(root, name)
+                try:
+                    size = os.path.getsize(abs_path)
+                except OSError:
+                    size = 0
+                files.append((abs_path, os.path.relpath(abs_path, folder_path), size))
+        return files
+
+    def compress_file(self, file_path, archive_path, fmt="zip"):
+        """压缩文件"""
+        self._compress(file_path, archive_path, fmt)
 
     def extract_file(self, file_path, extract_to):
         """解压单个文件"""
-        self.extract_archive(file_path, extract_to)
+        self._reset_dedup_index()
+        try:
+            self.extract_archive(file_path, extract_to)
+        finally:
+            if self.catalog is not None:
+                self.catalog.flush()
+            if self.journal is not None:
+                self.journal.flush()
     
+    def _reset_dedup_index(self):
+        """每次运行重新建立去重索引：同一个 Extractor（如界面）的上一次运行留下的解压结果可能已被删除或修改，
+        不能再作为reflink/硬链接的来源"""
+        self._dedup_index = {}
+
     def extract_folder(self, folder_path, extract_to=None):
         """解压文件夹中的所有压缩包"""
+        self._reset_dedup_index()
         if not extract_to:
             extract_to = folder_path
         archives = self._find_archives(folder_path)
+        if self.journal is not None:
+            # 续传时，上次解压目录中留下的内层压缩包由各自的最外层压缩包继续处理
+            archives = [a for a in archives if not self.journal.in_target(a)]
         if not archives:
             raise Exception("所选文件夹中没有找到支持的压缩包")
         for archive in archives:
             self._check_stop_and_pause()
-            sub_folder = self._get_base_folder(archive)
-            orig_sub_folder = sub_folder
-            count = 1
-            while os.path.exists(sub_folder):
-                sub_folder = f"{orig_sub_folder}_{count}"
-                count += 1
+            if self.journal is not None and self.journal.is_finished(archive):
+                continue
+            sub_folder = self.journal.target_of(archive) if self.journal is not None else None
+            if sub_folder is None:
+                sub_folder = self._get_base_folder(archive)
+                orig_sub_folder = sub_folder
+                count = 1
+                while os.path.exists(sub_folder):
+                    sub_folder = f"{orig_sub_folder}_{count}"
+                    count += 1
+                if self.journal is not None:
+                    self.journal.record_begin(archive, sub_folder)
             os.makedirs(sub_folder, exist_ok=True)
+            self._register_origin(archive, sub_folder)
+            self._register_logical(archive, sub_folder)
             self._show_progress(f"正在解压: {os.path.basename(archive)}")
             try:
-                self._extract_single_archive(archive, sub_folder)
-                
-                # 优化解压后的结构
-                self.optimize_extracted_structure(sub_folder)
+                nested = self.journal.nested_of(archive) if self.journal is not None else None
+                if nested is None:
+                    written = self._extract_single_archive(archive, sub_folder, depth=0)
+                    
+                    # 优化解压后的结构
+                    moves = self.optimize_extracted_structure(sub_folder)
+                    crcs = self._member_crcs(archive, sub_folder, moves)
+                    self._remember_logical(written, moves)
+                    written = self._remap_paths(written, moves)
+                    nested = self._archives_in(written)
+                    self._catalog_files(written, nested, crcs)
+                    if self.journal is not None:
+                        self.journal.record_extracted(archive, nested)
                 
                 # 处理嵌套压缩包
                 if not self._stop.is_set():
-                    self.extract_nested_archives(sub_folder)
+                    self.extract_nested_archives(sub_folder, nested)
                     
                 # 如果不需要保留原始压缩包，则删除
                 if not self.keep_original_archives and not self._stop.is_set():
                     self._safe_remove(archive)
+                if self.journal is not None and not self._stop.is_set():
+                    self.journal.record_finish(archive)
             except Exception as e:
                 self._show_progress(f"解压失败: {str(e)}")
                 continue
-                
-        if self.extracted_dirs:
-            open_folder(self.extracted_dirs[0])
+        if self.catalog is not None:
+            self.catalog.flush()
+        if self.journal is not None:
+            self.journal.flush()
+
+def _nested_archive_worker(archive, sub_folder, depth, options, stop_event, pause_event, progress_queue):
+    """进程池工作函数：在子进程中解压一层嵌套压缩包，返回新写出的内层压缩包供主进程继续调度、
+    需要由主进程写入解压目录的行，以及展平时移动过的内层压缩包的逻辑路径"""
+    worker = Extractor()
+    for name, value in options.items():
+        setattr(worker, name, value)
+    worker._stop = stop_event
+    worker._pause = pause_event
+    # 进度事件原样交给主进程，由主进程分发给文本/结构化回调
+    worker.event_callback = progress_queue.put
+    worker._show_progress(f"正在解压嵌套文件: {os.path.basename(archive)}")
+    try:
+        return worker._extract_nested_step(archive, sub_folder, depth), worker._catalog_rows, worker._logical_paths
+    finally:
+        if worker.journal is not None:
+            worker.journal.close()
+
+def _sevenzip_folders_worker(archive, target, names, stop_event, pause_event, bytes_queue):
+    """进程池工作函数：在子进程中只解压 names 所在的7z文件夹（固实块），py7zr 会跳过其余文件夹；
+    写出的字节数通过 bytes_queue 报告给主进程，返回写出的文件路径"""
+    worker = Extractor()
+    worker._stop = stop_event
+    worker._pause = pause_event
+    report = _QueueByteReporter(bytes_queue)
+    factory = _SevenZipWriterFactory(worker._check_stop_and_pause, report)
+    try:
+        with py7zr.SevenZipFile(archive, mode='r') as zf:
+            zf.extract(target, targets=names, factory=factory)
+    finally:
+        report.flush()
+    return factory.paths
 
 extractor = Extractor()
 extract_thread = None
+progress_channel = ProgressChannel(extractor._event_text)
+PROGRESS_POLL_MS = 50  # 界面刷新进度的间隔（毫秒），即每秒20帧
 
 def start_extract_file(file_paths, extract_to):
     global extract_thread
+    progress_channel.reset()
     extractor._stop.clear()
     extractor._pause.set()
     extractor.extracted_dirs.clear()
@@ -535,7 +3550,8 @@ def start_extract_file(file_paths, extract_to):
                 open_folder(extractor.extracted_dirs[0])
             messagebox.showinfo("提示", "所有压缩包已解压完成。")
         except Exception as e:
-            extractor.rollback()
+            if extractor.rollback_on_failure:
+                extractor.rollback()
             messagebox.showerror("错误", str(e))
             extractor._show_progress("")
 
@@ -544,6 +3560,7 @@ def start_extract_file(file_paths, extract_to):
 
 def start_extract_folder(folder_path, extract_to=None):
     global extract_thread
+    progress_channel.reset()
     extractor._stop.clear()
     extractor._pause.set()
     extractor.extracted_dirs.clear()
@@ -558,7 +3575,8 @@ def start_extract_folder(folder_path, extract_to=None):
                 open_folder(extractor.extracted_dirs[0])
             messagebox.showinfo("提示", "文件夹内所有压缩包已解压完成。")
         except Exception as e:
-            extractor.rollback()
+            if extractor.rollback_on_failure:
+                extractor.rollback()
             messagebox.showerror("错误", str(e))
             extractor._show_progress("")
 
@@ -587,7 +3605,7 @@ def on_drop(event):
 
 def on_choose_extract_file():
     filetypes = [
-        ("压缩包", "*.zip *.rar *.7z *.tar *.tar.gz *.tgz *.tar.bz2 *.tbz2"),
+        ("压缩包", "*.zip *.rar *.7z *.tar *.tar.gz *.tgz *.tar.bz2 *.tbz2 *.tar.zst *.tzst *.tar.lz4"),
         ("所有文件", "*.*")
     ]
     files = filedialog.askopenfilenames(
@@ -644,8 +3662,11 @@ def on_pause_resume():
 
 def on_stop():
     extractor.stop()
-    extractor.rollback()
-    messagebox.showinfo("提示", "操作已终止，已删除已解压内容。")
+    if extractor.rollback_on_failure:
+        extractor.rollback()
+        messagebox.showinfo("提示", "操作已终止，已删除已解压内容。")
+    else:
+        messagebox.showinfo("提示", "操作已终止，已解压的内容已保留，可续传。")
     progress_var.set("")
 
 def open_folder(path):
@@ -658,7 +3679,7 @@ def open_folder(path):
             subprocess.Popen(['xdg-open', path])
 
 def _is_supported_archive(filename):
-    return filename.lower().endswith(('.zip', '.rar', '.7z', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2'))
+    return extractor._detect_format(filename) is not None
 
 def on_compress_file():
     file_path = filedialog.askopenfilename(title="选择要压缩的文件")
@@ -672,12 +3693,29 @@ def on_compress_folder():
         return
     save_compressed_file(folder_path, is_file=False)
 
+def _format_for_archive_path(archive_path):
+    """根据保存的文件名确定压缩格式"""
+    fmt = "zip"
+    if archive_path.lower().endswith(".7z"):
+        fmt = "7z"
+    elif archive_path.lower().endswith(".tar.gz"):
+        fmt = "tar"
+    elif archive_path.lower().endswith((".tar.zst", ".tzst")):
+        fmt = "tar.zst"
+    elif archive_path.lower().endswith(".tar.lz4"):
+        fmt = "tar.lz4"
+    elif archive_path.lower().endswith(".rar") and _has_rar():
+        fmt = "rar"
+    return fmt
+
 def save_compressed_file(target_path, is_file):
     filetypes = [
         ("ZIP 压缩包", "*.zip"),
         ("7Z 压缩包", "*.7z"),
         ("TAR.GZ 压缩包", "*.tar.gz"),
-        ("RAR 压缩包", "*.rar") if has_rar else ("所有支持的压缩包", "*.zip *.7z *.tar.gz")
+        ("TAR.ZST 压缩包", "*.tar.zst"),
+        ("TAR.LZ4 压缩包", "*.tar.lz4"),
+        ("RAR 压缩包", "*.rar") if _has_rar() else ("所有支持的压缩包", "*.zip *.7z *.tar.gz *.tar.zst *.tar.lz4")
     ]
     
     default_name = os.path.basename(target_path)
@@ -694,15 +3732,10 @@ def save_compressed_file(target_path, is_file):
     if not archive_path:
         return
     
-    fmt = "zip"
-    if archive_path.lower().endswith(".7z"):
-        fmt = "7z"
-    elif archive_path.lower().endswith(".tar.gz"):
-        fmt = "tar"
-    elif archive_path.lower().endswith(".rar") and has_rar:
-        fmt = "rar"
+    fmt = _format_for_archive_path(archive_path)
     
     def compress_in_thread():
+        progress_channel.reset()
         extractor.compression_thread = threading.current_thread()
         try:
             if is_file:
@@ -713,7 +3746,7 @@ def save_compressed_file(target_path, is_file):
                     raise Exception(f"无效的文件夹路径: {target_path}")
                 
                 # 检查压缩格式
-                if fmt == "rar" and not has_rar:
+                if fmt == "rar" and not _has_rar():
                     raise Exception("不支持RAR格式，请安装rarfile库")
                 
                 extractor.compression_thread = threading.current_thread()
@@ -723,13 +3756,165 @@ def save_compressed_file(target_path, is_file):
             messagebox.showerror("压缩错误", f"压缩失败: {str(e)}")
         finally:
             extractor.compression_thread = None
-            progress_var.set("")
+            extractor._show_progress("")
     
     threading.Thread(target=compress_in_thread, daemon=True).start()
 
+def build_arg_parser():
+    """命令行参数（无界面批处理模式）"""
+    parser = argparse.ArgumentParser(
+        description="智能嵌套式压缩文件处理（无界面模式），不带参数运行时启动图形界面")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_extract = sub.add_parser("extract", help="解压压缩包或文件夹中的所有压缩包（含嵌套）")
+    p_extract.add_argument("paths", nargs="+", help="压缩包文件或包含压缩包的文件夹")
+    p_extract.add_argument("-o", "--output", help="解压目标文件夹，默认为压缩包所在目录")
+    p_extract.add_argument("-j", "--jobs", type=int, default=1, help="并行解压嵌套压缩包的进程数")
+    p_extract.add_argument("--zip-threads", type=int, default=1, help="单个ZIP包内并行解压的线程数")
+    p_extract.add_argument("--backend", choices=["python", "auto"] + sorted(EXTERNAL_BACKENDS), default="python",
+                           help="首选解压后端：python 为内置库，7z/bsdtar/unrar 为系统程序，auto 按实测速度选择；失败时自动换用其他后端")
+    p_extract.add_argument("--decompress-threads", type=int, default=1,
+                           help="tar.gz/tar.bz2 分段并行解压的线程数（多成员gzip、bzip2可分段，否则自动串行）")
+    p_extract.add_argument("--7z-workers", dest="sevenzip_workers", type=int, default=1,
+                           help="按文件夹（固实块）并行解压单个7z包的进程数（只有一个固实块时自动串行）")
+    p_extract.add_argument("--in-memory", action="store_true", help="嵌套压缩包直接从父包成员流解压，不落盘")
+    p_extract.add_argument("--keep-archives", action="store_true", help="保留解压出的内层压缩包")
+    p_extract.add_argument("--no-flatten", action="store_true", help="不展平单层文件夹")
+    p_extract.add_argument("--dedup", action="store_true",
+                           help="内容相同的嵌套压缩包只解压一次，其余位置用reflink/硬链接填充")
+    p_extract.add_argument("--catalog", help="把解压出的每个文件记录到该SQLite数据库（可跨多次运行累积）")
+    p_extract.add_argument("--journal", help="预写日志文件；设置后中断或出错时保留已解压内容，不回滚")
+    p_extract.add_argument("--resume", action="store_true", help="按 --journal 日志跳过已完成的部分继续解压")
+    p_extract.add_argument("--include", action="append", default=[], metavar="PATTERN",
+                           help="只解压逻辑嵌套路径（如 outer.zip/inner.7z/config/app.yml）匹配的文件，可多次指定；"
+                                "glob 中 ** 匹配任意层，/ 开头从最外层压缩包名开始匹配，re: 开头为正则表达式")
+    p_extract.add_argument("--exclude", action="append", default=[], metavar="PATTERN",
+                           help="不解压匹配的文件（优先于 --include），可多次指定")
+
+    p_find = sub.add_parser("find", help="在解压目录数据库中查找文件及其来源压缩包")
+    p_find.add_argument("catalog", help="extract --catalog 生成的SQLite数据库")
+    p_find.add_argument("pattern", help="文件名、嵌套链或路径，支持 * ? 通配符")
+
+    p_read = sub.add_parser("read", help="读取嵌套压缩包深处的文件，只解压通向它的各层成员")
+    p_read.add_argument("chains", nargs="+", metavar="path",
+                        help="嵌套路径，压缩包和成员之间用 !/ 分隔，如 a.zip!/b.7z!/etc/x.conf")
+    p_read.add_argument("-o", "--output", help="写入该文件（多个路径时依次追加），默认输出到标准输出")
+
+    p_compress = sub.add_parser("compress", help="压缩文件或文件夹")
+    p_compress.add_argument("path", help="要压缩的文件或文件夹")
+    p_compress.add_argument("-o", "--output", required=True, help="输出压缩包路径")
+    p_compress.add_argument("-f", "--format", choices=["zip", "7z", "tar", "tar.zst", "tar.lz4", "rar"],
+                            help="压缩格式，默认按输出文件扩展名判断")
+    p_compress.add_argument("--threads", type=int, default=1,
+                            help="ZIP 并行压缩 / zstd 多线程压缩的线程数（ZIP 输出与线程数无关）")
+    p_compress.add_argument("--level", type=int, default=None,
+                            help="tar.zst（1-22，默认3）/ tar.lz4（0-16，默认0）的压缩级别")
+    p_compress.add_argument("--compress-all", action="store_true",
+                            help="对所有文件都压缩，不跳过已压缩的数据（图片、视频、压缩包等）")
+    return parser
+
+def _print_event(event, file=None, **fields):
+    """以JSON行的形式输出进度"""
+    print(json.dumps(dict(event=event, **fields), ensure_ascii=False), file=file, flush=True)
+
+def cli_main(argv):
+    """无界面入口：解压/压缩/查询解压目录/读取嵌套文件，进度以JSON行输出到标准输出，返回进程退出码；
+    read 不指定 -o 时标准输出是文件内容，事件改为输出到标准错误"""
+    args = build_arg_parser().parse_args(argv)
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(encoding="utf-8")
+    events = sys.stderr if args.command == "read" and not args.output else None
+
+    worker = Extractor()
+
+    def on_event(event):
+        if event.phase != 'message' or event.message:
+            _print_event("progress", **event.to_dict())
+    worker.event_callback = on_event
+    try:
+        if args.command == "find":
+            catalog = ExtractionCatalog(args.catalog)
+            try:
+                for row in catalog.find(args.pattern):
+                    _print_event("file", **row)
+            finally:
+                catalog.close()
+            return 0
+        if args.command == "read":
+            target = open(args.output, 'wb') if args.output else sys.stdout.buffer
+            try:
+                for chain in args.chains:
+                    with worker.open_nested(chain) as stream:
+                        shutil.copyfileobj(stream, target, worker.copy_chunk_size)
+                target.flush()
+            finally:
+                if args.output:
+                    target.close()
+                worker.clear_read_cache()
+            if args.output:
+                _print_event("done", outputs=[args.output])
+            return 0
+        if args.command == "extract":
+            worker.parallel_workers = max(1, args.jobs)
+            worker.zip_threads = max(1, args.zip_threads)
+            worker.decompress_threads = max(1, args.decompress_threads)
+            worker.sevenzip_workers = max(1, args.sevenzip_workers)
+            worker.backend = args.backend
+            worker.in_memory_nested = args.in_memory
+            worker.keep_original_archives = args.keep_archives
+            worker.flatten_single_folder = not args.no_flatten
+            worker.dedup_nested = args.dedup
+            if args.include or args.exclude:
+                worker.path_filter = PathFilter(args.include, args.exclude)
+            if args.catalog:
+                worker.catalog = ExtractionCatalog(args.catalog)
+            if args.resume and not args.journal:
+                raise Exception("--resume 需要同时指定 --journal")
+            if args.journal:
+                worker.journal = ExtractionJournal(args.journal, resume=args.resume)
+                worker.rollback_on_failure = False
+            for path in args.paths:
+                if os.path.isdir(path):
+                    worker.extract_folder(path, args.output)
+                else:
+                    worker.extract_file(path, args.output or os.path.dirname(os.path.abspath(path)))
+            _print_event("done", outputs=worker.extracted_dirs, dedup=worker.dedup_stats)
+        else:
+            fmt = args.format or _format_for_archive_path(args.output)
+            worker.compress_threads = max(1, args.threads)
+            worker.compress_level = args.level
+            worker.adaptive_compression = not args.compress_all
+            if os.path.isdir(args.path):
+                worker.compress_folder(args.path, args.output, fmt=fmt)
+            else:
+                worker.compress_file(args.path, args.output, fmt=fmt)
+            _print_event("done", outputs=[args.output], compress=worker.compress_stats)
+        return 0
+    except KeyboardInterrupt:
+        worker.stop()
+        if worker.rollback_on_failure:
+            worker.rollback()
+        _print_event("error", file=events, message="用户终止了操作")
+        return 130
+    except Exception as e:
+        if worker.rollback_on_failure:
+            worker.rollback()
+        _print_event("error", file=events, message=str(e))
+        return 1
+    finally:
+        if worker.catalog is not None:
+            worker.catalog.close()
+        if worker.journal is not None:
+            worker.journal.close()
+
+if __name__ == "__main__" and len(sys.argv) > 1:
+    sys.exit(cli_main(sys.argv[1:]))
+
 if __name__ == "__main__":
     try:
-        from tkinterdnd2 import TkinterDnD
+        import tkinter as tk
+        from tkinter import messagebox, filedialog, ttk, Menu
+        from tkinterdnd2 import DND_FILES, TkinterDnD
     except ImportError:
         print("请先安装 tkinterdnd2：pip install tkinterdnd2")
         exit(1)
@@ -844,9 +4029,15 @@ if __name__ == "__main__":
     )
     progress_label.pack(fill=tk.X, pady=(10, 20))
 
-    def update_progress(msg):
-        root.after(0, progress_var.set, msg)
-    extractor.progress_callback = update_progress
+    # 工作线程只把进度写入通道，界面按固定帧率轮询显示最新状态
+    extractor.event_callback = progress_channel.push
+
+    def poll_progress():
+        text = progress_channel.poll()
+        if text is not None:
+            progress_var.set(text)
+        root.after(PROGRESS_POLL_MS, poll_progress)
+    poll_progress()
 
     # 配置拖放区域
     drag_frame.drop_target_register(DND_FILES)
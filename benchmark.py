@@ -0,0 +1,400 @@
+"""
+智能嵌套式压缩文件处理 - 基准测试
+
+生成可复现的嵌套压缩包语料，并对各版本的 Extractor 计时：
+    python benchmark.py gen 语料目录 --depth 3 --fanout 3 --formats zip,7z,tar.gz,tar.bz2
+    python benchmark.py run 语料目录 --target 2.5.py --target 2.4（解决层级和部分乱码）.py -o 结果.json
+
+run 的每个用例都在独立子进程中执行，报告墙钟时间、MB/s、文件数/s、峰值内存(RSS)和峰值磁盘占用，结果为JSON。
+"""
+import os
+import io
+import sys
+import bz2
+import gzip
+import json
+import time
+import random
+import shutil
+import tarfile
+import zipfile
+import argparse
+import threading
+import subprocess
+import types
+import statistics
+import importlib.util
+
+try:
+    import resource
+except ImportError:  # Windows 没有 resource 模块
+    resource = None
+
+FIXED_DATE_TIME = (2020, 1, 1, 0, 0, 0)  # 固定时间戳，保证语料逐字节可复现
+FIXED_MTIME = 1577836800
+SIZE_DISTRIBUTIONS = ("small", "mixed", "large")
+CORPUS_FORMATS = ("zip", "7z", "tar.gz", "tar.bz2")
+CASES = ("extract_archive", "extract_folder", "compress_folder")
+WORDS = [b"alpha", b"beta", b"gamma", b"delta", b"log", b"config", b"data", b"\xe6\x95\xb0\xe6\x8d\xae"]
+
+
+class _GBKZipInfo(zipfile.ZipInfo):
+    """文件名按GBK编码写入且不设置UTF-8标志位，模拟中文Windows生成的压缩包"""
+    def _encodeFilenameFlags(self):
+        return self.filename.encode("gbk"), self.flag_bits & ~0x800
+
+
+# ---------------------------------------------------------------- 语料生成
+
+def _file_size(rng, dist):
+    """按分布生成文件大小（字节）"""
+    if dist == "small":
+        return int(min(rng.lognormvariate(8, 1.2), 256 * 1024))
+    if dist == "large":
+        return rng.randint(1, 16) * 1024 * 1024
+    # mixed：大部分是小文件，少量大文件
+    if rng.random() < 0.05:
+        return rng.randint(1, 8) * 1024 * 1024
+    return int(min(rng.lognormvariate(9, 1.5), 1024 * 1024))
+
+
+def _file_content(rng, size):
+    """生成确定性的文件内容：一半是可压缩的文本，一半是随机字节"""
+    if rng.random() < 0.5:
+        out = bytearray()
+        while len(out) < size:
+            out += rng.choice(WORDS) + b" "
+        return bytes(out[:size])
+    return rng.randbytes(size)
+
+
+def _file_name(rng, index, encoding):
+    if encoding == "gbk":
+        return f"文件_{index}_{rng.randint(0, 9999)}.txt"
+    return f"file_{index}_{rng.randint(0, 9999)}.txt"
+
+
+def _pack(fmt, entries, encoding):
+    """把 [(成员名, 内容)] 打包成指定格式的压缩包，返回字节"""
+    buf = io.BytesIO()
+    if fmt == "zip":
+        with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+            for name, data in entries:
+                info = _GBKZipInfo(name, FIXED_DATE_TIME) if encoding == "gbk" else zipfile.ZipInfo(name, FIXED_DATE_TIME)
+                info.compress_type = zipfile.ZIP_DEFLATED
+                info.external_attr = 0o644 << 16
+                zf.writestr(info, data)
+    elif fmt in ("tar.gz", "tar.bz2"):
+        with tarfile.open(fileobj=buf, mode="w", encoding="gbk" if encoding == "gbk" else "utf-8",
+                          format=tarfile.GNU_FORMAT) as tf:
+            for name, data in entries:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = FIXED_MTIME
+                tf.addfile(info, io.BytesIO(data))
+        # gzip 头部带有时间戳，单独压缩并固定为0
+        if fmt == "tar.gz":
+            return gzip.compress(buf.getvalue(), mtime=0)
+        return bz2.compress(buf.getvalue())
+    elif fmt == "7z":
+        import py7zr
+        fixed = py7zr.helpers.ArchiveTimestamp.from_datetime(FIXED_MTIME)
+        with py7zr.SevenZipFile(buf, "w") as zf:
+            for name, data in entries:
+                zf.writestr(data, name)
+                # writestr 记录的是当前时间，改为固定时间戳
+                entry = zf.header.files_info.files[-1]
+                for key in ("creationtime", "lastwritetime", "lastaccesstime"):
+                    entry[key] = fixed
+    else:
+        raise ValueError(f"不支持的语料格式: {fmt}")
+    return buf.getvalue()
+
+
+def _build_archive(rng, level, args, counter):
+    """递归生成一个压缩包（含 fanout 个内层压缩包，直到 depth 层），返回 (字节, 扩展名)"""
+    fmt = args.formats[counter[0] % len(args.formats)]
+    counter[0] += 1
+    encoding = args.encodings[counter[0] % len(args.encodings)]
+    folder = f"层级{level}" if encoding == "gbk" else f"level{level}"
+    entries = []
+    for i in range(args.files):
+        entries.append((f"{folder}/{_file_name(rng, i, encoding)}",
+                        _file_content(rng, _file_size(rng, args.size_dist))))
+    if level < args.depth:
+        for i in range(args.fanout):
+            data, ext = _build_archive(rng, level + 1, args, counter)
+            entries.append((f"{folder}/inner_{level}_{i}.{ext}", data))
+    return _pack(fmt, entries, encoding), fmt
+
+
+def generate_corpus(args):
+    """生成语料：archives/ 为顶层嵌套压缩包，tree/ 为供压缩测试用的普通文件夹"""
+    rng = random.Random(args.seed)
+    archives_dir = os.path.join(args.corpus, "archives")
+    tree_dir = os.path.join(args.corpus, "tree")
+    if os.path.exists(args.corpus):
+        shutil.rmtree(args.corpus)
+    os.makedirs(archives_dir)
+    os.makedirs(tree_dir)
+
+    counter = [0]
+    for i in range(args.fanout):
+        data, ext = _build_archive(rng, 1, args, counter)
+        with open(os.path.join(archives_dir, f"corpus_{i}.{ext}"), "wb") as f:
+            f.write(data)
+
+    for i in range(args.files * args.fanout):
+        sub = os.path.join(tree_dir, f"dir{i % max(1, args.fanout)}")
+        os.makedirs(sub, exist_ok=True)
+        encoding = args.encodings[i % len(args.encodings)]
+        with open(os.path.join(sub, _file_name(rng, i, encoding)), "wb") as f:
+            f.write(_file_content(rng, _file_size(rng, args.size_dist)))
+
+    manifest = {
+        "seed": args.seed, "depth": args.depth, "fanout": args.fanout, "files": args.files,
+        "size_dist": args.size_dist, "formats": args.formats, "encodings": args.encodings,
+        "archives": counter[0],
+    }
+    with open(os.path.join(args.corpus, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    print(json.dumps(manifest, ensure_ascii=False))
+
+
+# ---------------------------------------------------------------- 计时
+
+def _tree_stats(path):
+    """统计目录下的文件数和总字节数"""
+    files = 0
+    size = 0
+    for root, _, names in os.walk(path):
+        for name in names:
+            try:
+                size += os.lstat(os.path.join(root, name)).st_size
+                files += 1
+            except OSError:
+                pass
+    return files, size
+
+
+class _DiskSampler(threading.Thread):
+    """后台定期统计工作目录大小，记录峰值磁盘占用"""
+    def __init__(self, path, interval):
+        super().__init__(daemon=True)
+        self.path = path
+        self.interval = interval
+        self.peak = 0
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, _tree_stats(self.path)[1])
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        self.peak = max(self.peak, _tree_stats(self.path)[1])
+
+
+def _peak_rss():
+    """本进程及子进程的峰值常驻内存（字节），不支持的平台返回None"""
+    if resource is None:
+        return None
+    scale = 1 if sys.platform == "darwin" else 1024  # Linux 上 ru_maxrss 的单位是KB
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) * scale
+
+
+class _GuiStub:
+    """代替 tkinter/tkinterdnd2 中的任何对象：基准测试不启动界面"""
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def __getattr__(self, name):
+        return self
+
+
+def _stub_gui_modules():
+    """旧版本在模块顶层导入 tkinter/tkinterdnd2，未安装或无图形环境时加载失败，执行前先放入空模块"""
+    for name in ("tkinter", "tkinterdnd2"):
+        if name not in sys.modules:
+            stub = types.ModuleType(name)
+            stub.__getattr__ = lambda attr: _GuiStub()
+            sys.modules[name] = stub
+
+
+def _load_target(path):
+    """按文件路径加载某个版本的程序，返回模块"""
+    _stub_gui_modules()
+    spec = importlib.util.spec_from_file_location("bench_target", path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules["bench_target"] = module  # 进程池需要能按模块名找到工作函数
+    spec.loader.exec_module(module)
+    module.open_folder = lambda path: None  # 旧版本解压后会打开文件管理器
+    return module
+
+
+def run_case(args):
+    """在当前进程中执行一个用例并输出一行JSON（由 run 通过子进程调用）"""
+    module = _load_target(args.target)
+    extractor = module.Extractor()
+    extractor.progress_callback = lambda msg: None
+    for option in args.option or []:
+        name, _, value = option.partition("=")
+        setattr(extractor, name, json.loads(value))
+
+    archives_dir = os.path.join(args.corpus, "archives")
+    tree_dir = os.path.join(args.corpus, "tree")
+    work = args.workdir
+    archives = sorted(os.path.join(archives_dir, f) for f in os.listdir(archives_dir))
+    if not hasattr(extractor, args.case):
+        print(json.dumps({"error": f"{args.case} 不存在于该版本"}, ensure_ascii=False))
+        return
+
+    if args.case == "extract_archive":
+        input_bytes = sum(os.path.getsize(a) for a in archives)
+        action = lambda: [extractor.extract_archive(a, work) for a in archives]
+    elif args.case == "extract_folder":
+        # extract_folder 会在原目录中解压并删除压缩包，先复制一份（不计时）
+        shutil.copytree(archives_dir, os.path.join(work, "archives"))
+        input_bytes = sum(os.path.getsize(a) for a in archives)
+        action = lambda: extractor.extract_folder(os.path.join(work, "archives"))
+    else:
+        input_bytes = _tree_stats(tree_dir)[1]
+        os.makedirs(work, exist_ok=True)
+        action = lambda: extractor.compress_folder(tree_dir, os.path.join(work, f"tree.{args.compress_format}"),
+                                                   fmt=args.compress_format)
+
+    sampler = _DiskSampler(work, args.disk_interval) if args.disk_interval > 0 else None
+    if sampler:
+        sampler.start()
+    start = time.perf_counter()
+    action()
+    wall = time.perf_counter() - start
+    if sampler:
+        sampler.stop()
+
+    if args.case == "compress_folder":
+        files, data_bytes = _tree_stats(tree_dir)
+    else:
+        files, data_bytes = _tree_stats(work)
+    print(json.dumps({
+        "wall_s": round(wall, 4),
+        "input_bytes": input_bytes,
+        "data_bytes": data_bytes,
+        "files": files,
+        "mb_per_s": round(data_bytes / wall / 1e6, 3) if wall else None,
+        "files_per_s": round(files / wall, 1) if wall else None,
+        "peak_rss_bytes": _peak_rss(),
+        "peak_disk_bytes": sampler.peak if sampler else None,
+    }, ensure_ascii=False))
+
+
+def run_benchmarks(args):
+    """对每个版本、每个用例重复执行若干次，汇总中位数"""
+    targets = args.target or [os.path.join(os.path.dirname(os.path.abspath(__file__)), "2.5.py")]
+    cases = args.case or list(CASES)
+    results = []
+    for target in targets:
+        for case in cases:
+            for repeat in range(args.repeat):
+                work = os.path.join(args.workdir, f"run_{len(results)}")
+                shutil.rmtree(work, ignore_errors=True)
+                cmd = [sys.executable, os.path.abspath(__file__), "_case", args.corpus,
+                       "--target", target, "--case", case, "--workdir", work,
+                       "--compress-format", args.compress_format, "--disk-interval", str(args.disk_interval)]
+                for option in args.option or []:
+                    cmd += ["--option", option]
+                proc = subprocess.run(cmd, capture_output=True, text=True, encoding="utf-8")
+                shutil.rmtree(work, ignore_errors=True)
+                record = {"target": os.path.basename(target), "case": case, "repeat": repeat}
+                try:
+                    record.update(json.loads(proc.stdout.strip().splitlines()[-1]))
+                except (IndexError, ValueError):
+                    record["error"] = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "无输出"
+                results.append(record)
+                print(json.dumps(record, ensure_ascii=False), file=sys.stderr)
+
+    summary = []
+    for target in targets:
+        for case in cases:
+            runs = [r for r in results
+                    if r["target"] == os.path.basename(target) and r["case"] == case and "wall_s" in r]
+            if runs:
+                summary.append({
+                    "target": os.path.basename(target), "case": case,
+                    "median_wall_s": statistics.median(r["wall_s"] for r in runs),
+                    "median_mb_per_s": statistics.median(r["mb_per_s"] or 0 for r in runs),
+                    "median_files_per_s": statistics.median(r["files_per_s"] or 0 for r in runs),
+                    "max_peak_rss_bytes": max((r["peak_rss_bytes"] or 0) for r in runs),
+                    "max_peak_disk_bytes": max((r["peak_disk_bytes"] or 0) for r in runs),
+                })
+
+    manifest_path = os.path.join(args.corpus, "manifest.json")
+    manifest = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    report = {"python": sys.version.split()[0], "platform": sys.platform, "corpus": manifest,
+              "options": args.option or [], "results": results, "summary": summary}
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="嵌套压缩包处理基准测试")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_gen = sub.add_parser("gen", help="生成可复现的嵌套压缩包语料")
+    p_gen.add_argument("corpus", help="语料输出目录（已存在会被清空）")
+    p_gen.add_argument("--seed", type=int, default=1)
+    p_gen.add_argument("--depth", type=int, default=3, help="嵌套层数")
+    p_gen.add_argument("--fanout", type=int, default=3, help="每层内层压缩包个数")
+    p_gen.add_argument("--files", type=int, default=20, help="每个压缩包中的普通文件数")
+    p_gen.add_argument("--size-dist", choices=SIZE_DISTRIBUTIONS, default="mixed", help="文件大小分布")
+    p_gen.add_argument("--formats", default="zip,tar.gz", help=f"逗号分隔，可选 {','.join(CORPUS_FORMATS)}")
+    p_gen.add_argument("--encodings", default="utf-8,gbk", help="文件名编码，逗号分隔，可选 utf-8,gbk")
+
+    def add_run_options(p):
+        p.add_argument("corpus", help="gen 生成的语料目录")
+        p.add_argument("--workdir", default=os.path.join(os.path.abspath("."), "bench_work"), help="解压/压缩输出的临时目录")
+        p.add_argument("--compress-format", default="zip", choices=["zip", "7z", "tar"])
+        p.add_argument("--disk-interval", type=float, default=0.05, help="磁盘占用采样间隔（秒），0表示不采样")
+        p.add_argument("--option", action="append", help="设置 Extractor 属性，如 parallel_workers=4（值按JSON解析）")
+
+    p_run = sub.add_parser("run", help="对各版本计时，输出JSON报告")
+    add_run_options(p_run)
+    p_run.add_argument("--target", action="append", help="要测试的版本文件，可重复，默认 2.5.py")
+    p_run.add_argument("--case", action="append", choices=CASES, help="要执行的用例，可重复，默认全部")
+    p_run.add_argument("--repeat", type=int, default=3)
+    p_run.add_argument("-o", "--output", help="报告输出文件，默认打印到标准输出")
+
+    p_case = sub.add_parser("_case")  # 内部使用：在子进程中执行单个用例
+    add_run_options(p_case)
+    p_case.add_argument("--target", required=True)
+    p_case.add_argument("--case", required=True, choices=CASES)
+
+    args = parser.parse_args(argv)
+    if args.command == "gen":
+        args.formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+        args.encodings = [e.strip() for e in args.encodings.split(",") if e.strip()]
+        for fmt in args.formats:
+            if fmt not in CORPUS_FORMATS:
+                parser.error(f"不支持的语料格式: {fmt}")
+        generate_corpus(args)
+    elif args.command == "run":
+        run_benchmarks(args)
+    else:
+        run_case(args)
+
+
+if __name__ == "__main__":
+    main()